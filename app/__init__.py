@@ -87,12 +87,21 @@ def create_app(config_class=Config):
     from app.models import (
         User, UserProfile, Competition, CompetitionCategory,
         Registration, IndividualRegistration, TeamRegistration,
-        Team, TeamMember, Payment
+        Team, TeamMember, Payment, PaymentLedgerEntry, CompetitionRevenue
     )
     
+    # Keep cached admin statistics in sync with committed changes
+    from app.utils.statistics import register_stats_listeners
+    register_stats_listeners()
+    
+    # Record payment status transitions in the ledger and revenue rollups
+    from app.models.ledger import register_ledger_listeners
+    register_ledger_listeners()
+    
     @login_manager.user_loader
     def load_user(user_id):
-        return User.query.get(int(user_id))
+        # Flask-Login keeps the loaded user for the rest of the request
+        return User.load_identity(user_id)
     
     # Register blueprints
     from app.blueprints.main import bp as main_bp
@@ -116,14 +125,21 @@ def create_app(config_class=Config):
     from app.blueprints.errors import bp as errors_bp
     app.register_blueprint(errors_bp)
     
+    # Maintenance CLI commands
+    from app.commands import register_commands
+    register_commands(app)
+    
     # Template context processors and global functions
     @app.context_processor
     def inject_verification_utilities():
         """Make verification utilities available in all templates"""
+        from flask_login import current_user
         from app.utils.verification import ProfileVerificationHelper, check_competition_eligibility
         return {
             'ProfileVerificationHelper': ProfileVerificationHelper,
-            'check_competition_eligibility': check_competition_eligibility
+            'check_competition_eligibility': check_competition_eligibility,
+            # Memoized per request, shared with the helper calls in templates
+            'profile_status': ProfileVerificationHelper.get_profile_status_info(current_user)
         }
 
     @app.context_processor
@@ -133,5 +149,9 @@ def create_app(config_class=Config):
     # Create database tables
     with app.app_context():
         db.create_all()
+        
+        # Full-text user search (FTS5 on SQLite, LIKE elsewhere)
+        from app.utils.search import init_search_index
+        init_search_index(app)
     
     return app
\ No newline at end of file
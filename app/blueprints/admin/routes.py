@@ -1,9 +1,192 @@
-from flask import render_template, request, flash, redirect, url_for, jsonify
+from flask import render_template, request, flash, redirect, url_for, jsonify, current_app
 from flask_login import login_required, current_user
 from app.blueprints.admin import bp
 from app.models.user import User, UserProfile
+from app.utils.pagination import keyset_paginate, get_per_page, sync_watermark, changes_since
+from app.utils.statistics import get_verification_stats, get_payment_stats
+from app.utils.search import user_search_filter
+from app.utils.file_handler import FileHandler
+from app.utils.review_queue import claim_batch, claimed_by_filter, release_claims
+from app.utils.export import stream_csv, stream_xlsx, EXPORT_BATCH_SIZE
 from app import db
 
+# Sort order of the verification queue; matches ix_user_profiles_verification_queue
+VERIFICATION_QUEUE_ORDER = [
+    (UserProfile.is_verified, 'asc'),
+    (UserProfile.verification_progress, 'desc'),
+    (UserProfile.created_at, 'desc'),
+    (UserProfile.id, 'desc'),
+]
+
+
+def verification_queue_key(user):
+    """Get keyset pagination key of a user in the verification queue"""
+    profile = user.profile
+    return (profile.is_verified, profile.verification_progress, profile.created_at, profile.id)
+
+# Change order for delta sync polling; backed by the updated_at indexes
+VERIFICATION_SYNC_ORDER = [
+    (UserProfile.updated_at, 'asc'),
+    (UserProfile.id, 'asc'),
+]
+
+# Value of the `mode` parameter for the claim-based review queue
+REVIEW_QUEUE_MODE = 'antrian'
+
+
+def claim_review_batch(model, order_by):
+    """Claim a review queue batch of model items for the current admin"""
+    return claim_batch(
+        model,
+        current_user.id,
+        model.review_queue_filter(),
+        order_by,
+        current_app.config['REVIEW_BATCH_SIZE'],
+        current_app.config['REVIEW_LEASE_MINUTES']
+    )
+
+
+def payment_sync_order():
+    """Get change order for payment delta sync polling"""
+    from app.models.payment import Payment
+    return [(Payment.updated_at, 'asc'), (Payment.id, 'asc')]
+
+
+def payment_review_order():
+    """Get sort order of the admin payment list; matches ix_payments_status_upload"""
+    from app.models.payment import Payment
+    return [(Payment.tanggal_upload, 'desc'), (Payment.id, 'desc')]
+
+
+def payment_review_key(payment):
+    """Get keyset pagination key of a payment in the admin payment list"""
+    return (payment.tanggal_upload, payment.id)
+
+
+def payment_review_query():
+    """Get payment query joined and eager loaded with registration, competition, user and profile"""
+    from app.models.payment import Payment
+    from app.models.registration import Registration
+    from app.models.competition import Competition
+    
+    return Payment.query \
+        .join(Payment.registration) \
+        .join(Registration.competition) \
+        .join(User, Registration.user_id == User.id) \
+        .outerjoin(UserProfile, UserProfile.user_id == User.id) \
+        .options(
+            db.contains_eager(Payment.registration).contains_eager(Registration.competition),
+            db.contains_eager(Payment.registration).contains_eager(Registration.user)
+                .contains_eager(User.profile)
+        )
+
+
+def participant_export_query(competition_id, status_filter='all'):
+    """
+    Get registrations of a competition for export, eager loaded in a single query
+    
+    User, profile, payment and team are joined and loaded with the
+    registration, so iterating the query (also with yield_per) issues no
+    further queries per row.
+    
+    Args:
+        competition_id: Competition ID
+        status_filter: 'all', 'approved' (registration approved) or 'paid' (payment approved)
+    """
+    from app.models.registration import Registration, Team
+    from app.models.payment import Payment
+    
+    query = Registration.query \
+        .filter(Registration.competition_id == competition_id) \
+        .join(User, Registration.user_id == User.id) \
+        .outerjoin(UserProfile, UserProfile.user_id == User.id) \
+        .outerjoin(Payment, Payment.registration_id == Registration.id) \
+        .outerjoin(Team, Registration.team_id == Team.id) \
+        .options(
+            db.contains_eager(Registration.user).contains_eager(User.profile),
+            db.contains_eager(Registration.payment),
+            db.contains_eager(Registration.team)
+        )
+    
+    if status_filter == 'approved':
+        query = query.filter(Registration.status == 'approved')
+    elif status_filter == 'paid':
+        query = query.filter(Payment.status == 'approved')
+    
+    return query.order_by(Registration.id)
+
+
+def team_positions(competition_id):
+    """Get (team ID, user ID) -> position display of all team members of a competition in one query"""
+    from app.models.registration import Team, TeamMember
+    
+    members = TeamMember.query.join(Team, TeamMember.team_id == Team.id) \
+        .filter(Team.competition_id == competition_id)
+    return {(member.team_id, member.user_id): member.get_position_display() for member in members}
+
+
+def competition_export_stats():
+    """
+    Get registration counts and revenue of every competition in one query
+    
+    Registrations are counted with a single GROUP BY competition_id aggregate,
+    and revenue is summed live from approved payments with CASE aggregates
+    splitting early bird and regular prices, joined in the same statement.
+    
+    Returns:
+        list: One dict per competition with the competition, total_registrations,
+              approved_registrations, paid_registrations, revenue,
+              early_bird_revenue and regular_revenue
+    """
+    from app.models.competition import Competition
+    from app.models.registration import Registration
+    from app.models.ledger import CompetitionRevenue
+    
+    registration_counts = db.select(
+        Registration.competition_id,
+        db.func.count(Registration.id).label('total'),
+        db.func.sum(db.case((Registration.status == 'approved', 1), else_=0)).label('approved')
+    ).group_by(Registration.competition_id).subquery()
+    revenue = CompetitionRevenue.totals_query().subquery()
+    
+    rows = db.session.query(
+        Competition, registration_counts.c.total, registration_counts.c.approved,
+        revenue.c.paid_count, revenue.c.revenue, revenue.c.early_bird_revenue
+    ) \
+        .outerjoin(registration_counts, registration_counts.c.competition_id == Competition.id) \
+        .outerjoin(revenue, revenue.c.competition_id == Competition.id) \
+        .order_by(Competition.id) \
+        .all()
+    
+    return [
+        {
+            'competition': competition,
+            'total_registrations': total or 0,
+            'approved_registrations': approved or 0,
+            'paid_registrations': paid or 0,
+            'revenue': total_revenue or 0,
+            'early_bird_revenue': early_bird_revenue or 0,
+            'regular_revenue': (total_revenue or 0) - (early_bird_revenue or 0)
+        }
+        for competition, total, approved, paid, total_revenue, early_bird_revenue in rows
+    ]
+
+
+def get_sync_limit():
+    """Get number of changed rows returned per delta sync poll"""
+    return get_per_page(
+        request.args.get('limit', type=int),
+        current_app.config['ADMIN_MAX_PER_PAGE'],
+        current_app.config['ADMIN_MAX_PER_PAGE']
+    )
+
+
+def review_redirect_url(endpoint):
+    """Get URL to return to after a review action, staying in queue mode if it was used"""
+    if request.form.get('mode') == REVIEW_QUEUE_MODE:
+        return url_for(endpoint, mode=REVIEW_QUEUE_MODE)
+    return url_for(endpoint)
+
 def admin_required(f):
     """Decorator to require admin access"""
     def decorated_function(*args, **kwargs):
@@ -21,17 +204,9 @@ def dashboard():
     """Admin dashboard"""
     return render_template('admin/dashboard.html')
 
-@bp.route('/verifikasi')
-@login_required
-@admin_required
-def verifikasi():
-    """User verification interface"""
-    # Get filter parameters
-    status_filter = request.args.get('status', 'all')
-    search_query = request.args.get('search', '')
-    
-    # Base query for users with profiles
-    query = User.query.join(UserProfile).filter(UserProfile.id.isnot(None))
+def filter_verification_query(query, status_filter, search_query):
+    """Apply verifikasi status and search filters to a query joining User and UserProfile"""
+    query = query.filter(UserProfile.id.isnot(None))
     
     # Apply status filter
     if status_filter == 'verified':
@@ -45,40 +220,67 @@ def verifikasi():
     
     # Apply search filter
     if search_query:
-        query = query.filter(
-            db.or_(
-                User.email.contains(search_query),
-                UserProfile.nama_lengkap.contains(search_query),
-                UserProfile.sekolah.contains(search_query)
-            )
+        query = query.filter(user_search_filter(search_query))
+    
+    return query
+
+@bp.route('/verifikasi')
+@login_required
+@admin_required
+def verifikasi():
+    """User verification interface"""
+    # Get filter parameters
+    status_filter = request.args.get('status', 'all')
+    search_query = request.args.get('search', '')
+    
+    queue_mode = request.args.get('mode') == REVIEW_QUEUE_MODE
+    # Taken before the list query so concurrent changes show up in the first poll
+    watermark = sync_watermark()
+    per_page = get_per_page(
+        request.args.get('per_page', type=int),
+        current_app.config['ADMIN_VERIFICATION_PER_PAGE'],
+        current_app.config['ADMIN_MAX_PER_PAGE']
+    )
+    
+    if queue_mode:
+        # Only the batch leased to this admin, oldest profiles first
+        claim_order = [UserProfile.created_at, UserProfile.id]
+        _, lease_expires_at = claim_review_batch(UserProfile, claim_order)
+        users = User.query.join(UserProfile).filter(
+            claimed_by_filter(UserProfile, current_user.id),
+            UserProfile.review_queue_filter()
+        ).options(db.contains_eager(User.profile)).order_by(*claim_order).all()
+        page = None
+        queue = {'count': len(users), 'expires_at': lease_expires_at}
+    else:
+        query = filter_verification_query(
+            User.query.join(UserProfile),
+            status_filter,
+            search_query
+        )
+        
+        # Order by verification status and creation date, one page at a time
+        page = keyset_paginate(
+            query.options(db.contains_eager(User.profile)),
+            VERIFICATION_QUEUE_ORDER,
+            verification_queue_key,
+            cursor=request.args.get('cursor'),
+            per_page=per_page
         )
+        users = page.items
+        queue = None
     
-    # Order by verification status and creation date
-    users = query.order_by(
-        UserProfile.is_verified.asc(),
-        UserProfile.verification_progress.desc(),
-        User.created_at.desc()
-    ).all()
-    
-    # Calculate statistics
-    total_users = User.query.join(UserProfile).count()
-    verified_users = User.query.join(UserProfile).filter(UserProfile.is_verified == True).count()
-    complete_profiles = User.query.join(UserProfile).filter(UserProfile.verification_progress == 100).count()
-    pending_verification = User.query.join(UserProfile).filter(
-        UserProfile.verification_progress == 100,
-        UserProfile.is_verified == False
-    ).count()
-    
-    stats = {
-        'total_users': total_users,
-        'verified_users': verified_users,
-        'complete_profiles': complete_profiles,
-        'pending_verification': pending_verification,
-        'verification_rate': round((verified_users / total_users * 100) if total_users > 0 else 0, 1)
-    }
+    # Calculate statistics (cached, single aggregate query)
+    stats = get_verification_stats()
     
     return render_template('admin/verifikasi.html', 
                          users=users, 
+                         page=page,
+                         queue=queue,
+                         queue_mode_value=REVIEW_QUEUE_MODE,
+                         sync_watermark=watermark,
+                         FileHandler=FileHandler,
+                         per_page=per_page,
                          stats=stats,
                          status_filter=status_filter,
                          search_query=search_query)
@@ -92,17 +294,17 @@ def approve_user(user_id):
     
     if not user.profile:
         flash('User tidak memiliki profil.', 'danger')
-        return redirect(url_for('admin.verifikasi'))
+        return redirect(review_redirect_url('admin.verifikasi'))
     
     if user.profile.verification_progress < 100:
         flash('Profil user belum lengkap. Tidak dapat diverifikasi.', 'warning')
-        return redirect(url_for('admin.verifikasi'))
+        return redirect(review_redirect_url('admin.verifikasi'))
     
-    user.profile.is_verified = True
+    user.profile.record_review(True)
     db.session.commit()
     
     flash(f'User {user.profile.get_display_name()} berhasil diverifikasi.', 'success')
-    return redirect(url_for('admin.verifikasi'))
+    return redirect(review_redirect_url('admin.verifikasi'))
 
 @bp.route('/verifikasi/reject/<int:user_id>', methods=['POST'])
 @login_required
@@ -113,13 +315,13 @@ def reject_user(user_id):
     
     if not user.profile:
         flash('User tidak memiliki profil.', 'danger')
-        return redirect(url_for('admin.verifikasi'))
+        return redirect(review_redirect_url('admin.verifikasi'))
     
-    user.profile.is_verified = False
+    user.profile.record_review(False)
     db.session.commit()
     
     flash(f'Verifikasi user {user.profile.get_display_name()} ditolak.', 'warning')
-    return redirect(url_for('admin.verifikasi'))
+    return redirect(review_redirect_url('admin.verifikasi'))
 
 @bp.route('/verifikasi/bulk-action', methods=['POST'])
 @login_required
@@ -127,32 +329,44 @@ def reject_user(user_id):
 def bulk_verification_action():
     """Handle bulk verification actions"""
     action = request.form.get('action')
-    user_ids = request.form.getlist('user_ids')
+    scope = request.form.get('scope', 'selected')  # selected, filter
     
-    if not user_ids:
-        flash('Tidak ada user yang dipilih.', 'warning')
-        return redirect(url_for('admin.verifikasi'))
+    if action not in ('approve', 'reject'):
+        flash('Aksi tidak valid.', 'warning')
+        return redirect(review_redirect_url('admin.verifikasi'))
     
-    success_count = 0
     error_count = 0
     
-    for user_id in user_ids:
-        try:
-            user = User.query.get(int(user_id))
-            if user and user.profile:
-                if action == 'approve':
-                    if user.profile.verification_progress == 100:
-                        user.profile.is_verified = True
-                        success_count += 1
-                    else:
-                        error_count += 1
-                elif action == 'reject':
-                    user.profile.is_verified = False
-                    success_count += 1
-        except (ValueError, AttributeError):
-            error_count += 1
+    if scope == 'filter':
+        # Apply to every user matching the current filter; only their IDs are loaded
+        status_filter = request.form.get('status', 'all')
+        search_query = request.form.get('search', '')
+        selection = filter_verification_query(
+            db.session.query(User.id).join(UserProfile),
+            status_filter,
+            search_query
+        )
+        user_ids = db.session.scalars(selection.statement).all()
+        selected_count = len(user_ids)
+        redirect_url = url_for('admin.verifikasi', status=status_filter, search=search_query)
+    else:
+        user_ids = set()
+        for user_id in request.form.getlist('user_ids'):
+            try:
+                user_ids.add(int(user_id))
+            except ValueError:
+                error_count += 1
+        selected_count = len(user_ids)
+        user_ids = list(user_ids)
+        redirect_url = review_redirect_url('admin.verifikasi')
     
-    db.session.commit()
+    if not selected_count:
+        flash('Tidak ada user yang dipilih.', 'warning')
+        return redirect(redirect_url)
+    
+    success_count = UserProfile.bulk_set_verification(user_ids, action == 'approve')
+    # Selected users without a (complete) profile are skipped
+    error_count += selected_count - success_count
     
     if success_count > 0:
         action_text = 'diverifikasi' if action == 'approve' else 'ditolak'
@@ -161,8 +375,48 @@ def bulk_verification_action():
     if error_count > 0:
         flash(f'{error_count} user gagal diproses.', 'warning')
     
+    return redirect(redirect_url)
+
+@bp.route('/verifikasi/antrian/lepas', methods=['POST'])
+@login_required
+@admin_required
+def release_verification_queue():
+    """Return profiles claimed by the current admin to the review queue"""
+    released = release_claims(UserProfile, current_user.id)
+    flash(f'{released} profil dikembalikan ke antrian.', 'info')
     return redirect(url_for('admin.verifikasi'))
 
+@bp.route('/api/verifikasi/perubahan')
+@login_required
+@admin_required
+def verification_changes():
+    """Get profiles changed since the client's watermark (AJAX endpoint)"""
+    users, watermark, has_more = changes_since(
+        User.query.join(UserProfile).options(db.contains_eager(User.profile)),
+        VERIFICATION_SYNC_ORDER,
+        lambda user: (user.profile.updated_at, user.profile.id),
+        watermark=request.args.get('since'),
+        limit=get_sync_limit()
+    )
+    
+    return jsonify({
+        'success': True,
+        'watermark': watermark,
+        'has_more': has_more,
+        'users': [
+            {
+                'id': user.id,
+                'email': user.email,
+                'nama': user.profile.get_display_name(),
+                'is_verified': user.profile.is_verified,
+                'verification_progress': user.profile.verification_progress,
+                'claimed_by': user.profile.claimed_by,
+                'updated_at': user.profile.updated_at.isoformat()
+            }
+            for user in users
+        ]
+    })
+
 
 @bp.route('/pembayaran')
 @login_required
@@ -170,58 +424,111 @@ def bulk_verification_action():
 def pembayaran():
     """Payment approval interface"""
     from app.models.payment import Payment
-    from app.models.registration import Registration
     from app.models.competition import Competition
     
     # Get filter parameters
     status_filter = request.args.get('status', 'pending')
     search_query = request.args.get('search', '')
     
-    # Base query for payments with registrations
-    query = Payment.query.join(Registration).join(Competition)
-    
-    # Apply status filter
-    if status_filter != 'all':
-        query = query.filter(Payment.status == status_filter)
-    
-    # Apply search filter
-    if search_query:
-        query = query.join(User).join(UserProfile).filter(
-            db.or_(
-                User.email.contains(search_query),
-                UserProfile.nama_lengkap.contains(search_query),
-                Competition.nama_kompetisi.contains(search_query)
+    queue_mode = request.args.get('mode') == REVIEW_QUEUE_MODE
+    # Taken before the list query so concurrent changes show up in the first poll
+    watermark = sync_watermark()
+    
+    per_page = get_per_page(
+        request.args.get('per_page', type=int),
+        current_app.config['ADMIN_PAYMENT_PER_PAGE'],
+        current_app.config['ADMIN_MAX_PER_PAGE']
+    )
+    
+    if queue_mode:
+        # Only the batch leased to this admin, oldest uploads first
+        claim_order = [Payment.tanggal_upload, Payment.id]
+        _, lease_expires_at = claim_review_batch(Payment, claim_order)
+        payments = payment_review_query().filter(
+            claimed_by_filter(Payment, current_user.id),
+            Payment.review_queue_filter()
+        ).order_by(*claim_order).all()
+        page = None
+        queue = {'count': len(payments), 'expires_at': lease_expires_at}
+    else:
+        query = payment_review_query()
+        
+        # Apply status filter
+        if status_filter != 'all':
+            query = query.filter(Payment.status == status_filter)
+        
+        # Apply search filter
+        if search_query:
+            query = query.filter(
+                db.or_(
+                    user_search_filter(search_query),
+                    Competition.nama_kompetisi.contains(search_query)
+                )
             )
+        
+        # Order by upload date (newest first), one page at a time
+        page = keyset_paginate(
+            query,
+            payment_review_order(),
+            payment_review_key,
+            cursor=request.args.get('cursor'),
+            per_page=per_page
         )
+        payments = page.items
+        queue = None
     
-    # Order by upload date (newest first)
-    payments = query.order_by(Payment.tanggal_upload.desc()).all()
-    
-    # Calculate statistics
-    total_payments = Payment.query.count()
-    pending_payments = Payment.query.filter_by(status='pending').count()
-    approved_payments = Payment.query.filter_by(status='approved').count()
-    rejected_payments = Payment.query.filter_by(status='rejected').count()
-    
-    # Calculate total revenue
-    total_revenue = db.session.query(db.func.sum(Payment.jumlah)).filter_by(status='approved').scalar() or 0
+    # Other payments using the same proof file (one indexed lookup per page)
+    shared_proofs = Payment.find_shared_proofs(payments)
     
-    stats = {
-        'total_payments': total_payments,
-        'pending_payments': pending_payments,
-        'approved_payments': approved_payments,
-        'rejected_payments': rejected_payments,
-        'total_revenue': total_revenue,
-        'approval_rate': round((approved_payments / total_payments * 100) if total_payments > 0 else 0, 1)
-    }
+    # Calculate statistics (cached, single GROUP BY status query)
+    stats = get_payment_stats()
     
     return render_template('admin/pembayaran.html', 
                          payments=payments, 
+                         shared_proofs=shared_proofs,
+                         page=page,
+                         per_page=per_page,
+                         queue=queue,
+                         queue_mode_value=REVIEW_QUEUE_MODE,
+                         sync_watermark=watermark,
                          stats=stats,
                          status_filter=status_filter,
                          search_query=search_query)
 
 
+@bp.route('/api/pembayaran/perubahan')
+@login_required
+@admin_required
+def payment_changes():
+    """Get payments changed since the client's watermark (AJAX endpoint)"""
+    from app.models.payment import Payment
+    
+    payments, watermark, has_more = changes_since(
+        Payment.query,
+        payment_sync_order(),
+        lambda payment: (payment.updated_at, payment.id),
+        watermark=request.args.get('since'),
+        limit=get_sync_limit()
+    )
+    
+    return jsonify({
+        'success': True,
+        'watermark': watermark,
+        'has_more': has_more,
+        'payments': [
+            {
+                'id': payment.id,
+                'status': payment.status,
+                'status_display': payment.get_status_display(),
+                'has_proof': bool(payment.bukti_pembayaran),
+                'claimed_by': payment.claimed_by,
+                'updated_at': payment.updated_at.isoformat()
+            }
+            for payment in payments
+        ]
+    })
+
+
 @bp.route('/pembayaran/approve/<int:payment_id>', methods=['POST'])
 @login_required
 @admin_required
@@ -234,7 +541,7 @@ def approve_payment(payment_id):
     
     if payment.status != 'pending':
         flash('Pembayaran ini sudah diproses.', 'warning')
-        return redirect(url_for('admin.pembayaran'))
+        return redirect(review_redirect_url('admin.pembayaran'))
     
     success, message = payment.approve_payment(current_user.id, notes)
     
@@ -243,7 +550,7 @@ def approve_payment(payment_id):
     else:
         flash(f'Gagal menyetujui pembayaran: {message}', 'error')
     
-    return redirect(url_for('admin.pembayaran'))
+    return redirect(review_redirect_url('admin.pembayaran'))
 
 
 @bp.route('/pembayaran/reject/<int:payment_id>', methods=['POST'])
@@ -258,11 +565,11 @@ def reject_payment(payment_id):
     
     if payment.status != 'pending':
         flash('Pembayaran ini sudah diproses.', 'warning')
-        return redirect(url_for('admin.pembayaran'))
+        return redirect(review_redirect_url('admin.pembayaran'))
     
     if not notes:
         flash('Catatan penolakan harus diisi.', 'error')
-        return redirect(url_for('admin.pembayaran'))
+        return redirect(review_redirect_url('admin.pembayaran'))
     
     success, message = payment.reject_payment(current_user.id, notes)
     
@@ -271,7 +578,7 @@ def reject_payment(payment_id):
     else:
         flash(f'Gagal menolak pembayaran: {message}', 'error')
     
-    return redirect(url_for('admin.pembayaran'))
+    return redirect(review_redirect_url('admin.pembayaran'))
 
 
 @bp.route('/pembayaran/bulk-action', methods=['POST'])
@@ -282,78 +589,120 @@ def bulk_payment_action():
     from app.models.payment import Payment
     
     action = request.form.get('action')
-    payment_ids = request.form.getlist('payment_ids')
     notes = request.form.get('bulk_notes', '')
     
+    payment_ids = []
+    invalid_count = 0
+    for payment_id in request.form.getlist('payment_ids'):
+        try:
+            payment_ids.append(int(payment_id))
+        except ValueError:
+            invalid_count += 1
+    
     if not payment_ids:
         flash('Tidak ada pembayaran yang dipilih.', 'warning')
-        return redirect(url_for('admin.pembayaran'))
+        return redirect(review_redirect_url('admin.pembayaran'))
+    
+    if action not in ('approve', 'reject'):
+        flash('Aksi tidak valid.', 'warning')
+        return redirect(review_redirect_url('admin.pembayaran'))
     
     if action == 'reject' and not notes:
         flash('Catatan penolakan harus diisi untuk aksi massal.', 'error')
-        return redirect(url_for('admin.pembayaran'))
+        return redirect(review_redirect_url('admin.pembayaran'))
     
-    success_count = 0
-    error_count = 0
+    # One query to load, one commit for the whole selection
+    outcomes = Payment.bulk_review(payment_ids, action, current_user.id, notes)
     
-    for payment_id in payment_ids:
-        try:
-            payment = Payment.query.get(int(payment_id))
-            if payment and payment.status == 'pending':
-                if action == 'approve':
-                    success, _ = payment.approve_payment(current_user.id, notes)
-                    if success:
-                        success_count += 1
-                    else:
-                        error_count += 1
-                elif action == 'reject':
-                    success, _ = payment.reject_payment(current_user.id, notes)
-                    if success:
-                        success_count += 1
-                    else:
-                        error_count += 1
-            else:
-                error_count += 1
-        except (ValueError, AttributeError):
-            error_count += 1
+    success_count = sum(1 for success, _ in outcomes.values() if success)
+    failures = {}
+    for payment_id, (success, message) in outcomes.items():
+        if not success:
+            failures.setdefault(message, []).append(f'#{payment_id}')
     
     if success_count > 0:
         action_text = 'disetujui' if action == 'approve' else 'ditolak'
         flash(f'{success_count} pembayaran berhasil {action_text}.', 'success')
     
+    error_count = invalid_count + sum(len(ids) for ids in failures.values())
     if error_count > 0:
-        flash(f'{error_count} pembayaran gagal diproses.', 'warning')
+        details = '; '.join(f'{message}: {", ".join(ids)}' for message, ids in failures.items())
+        flash(f'{error_count} pembayaran gagal diproses. {details}'.strip(), 'warning')
     
+    return redirect(review_redirect_url('admin.pembayaran'))
+
+
+@bp.route('/pembayaran/antrian/lepas', methods=['POST'])
+@login_required
+@admin_required
+def release_payment_queue():
+    """Return payments claimed by the current admin to the review queue"""
+    from app.models.payment import Payment
+    
+    released = release_claims(Payment, current_user.id)
+    flash(f'{released} pembayaran dikembalikan ke antrian.', 'info')
     return redirect(url_for('admin.pembayaran'))
 
 
+@bp.route('/pembayaran/rekonsiliasi', methods=['GET', 'POST'])
+@login_required
+@admin_required
+def reconcile_payments():
+    """Match a bank mutation CSV against pending payments and propose bulk approvals"""
+    from app.models.payment import Payment
+    from app.utils.reconciliation import parse_bank_csv, match_bank_lines, MATCHED, AMBIGUOUS, UNMATCHED
+    
+    window_hours = current_app.config['RECONCILIATION_WINDOW_HOURS']
+    results = None
+    errors = []
+    payments = {}
+    summary = {}
+    
+    if request.method == 'POST':
+        file = request.files.get('mutasi')
+        if not file or not file.filename:
+            flash('Pilih file CSV mutasi bank terlebih dahulu.', 'warning')
+            return redirect(url_for('admin.reconcile_payments'))
+        
+        if FileHandler.get_file_extension(file.filename) != 'csv':
+            flash('File mutasi bank harus berformat CSV.', 'error')
+            return redirect(url_for('admin.reconcile_payments'))
+        
+        lines, errors = parse_bank_csv(file.stream)
+        results = match_bank_lines(lines, window_hours)
+        
+        # Details of every proposed payment in one query
+        proposed_ids = [result['payment_id'] for result in results if result['payment_id']]
+        if proposed_ids:
+            payments = {
+                payment.id: payment
+                for payment in payment_review_query().filter(Payment.id.in_(proposed_ids))
+            }
+        
+        summary = {
+            status: sum(1 for result in results if result['status'] == status)
+            for status in (MATCHED, AMBIGUOUS, UNMATCHED)
+        }
+    
+    return render_template('admin/rekonsiliasi.html',
+                         results=results,
+                         payments=payments,
+                         errors=errors,
+                         summary=summary,
+                         window_hours=window_hours)
+
+
 @bp.route('/export')
 @login_required
 @admin_required
 def export_dashboard():
     """Export dashboard"""
-    from app.models.competition import Competition
-    from app.models.registration import Registration
-    from app.models.payment import Payment
-    
-    # Get competition statistics for export options
-    competitions = Competition.query.all()
-    
-    export_stats = []
-    for competition in competitions:
-        registrations = Registration.query.filter_by(competition_id=competition.id).all()
-        approved_registrations = [r for r in registrations if r.status == 'approved']
-        paid_registrations = [r for r in registrations if r.payment and r.payment.status == 'approved']
-        
-        export_stats.append({
-            'competition': competition,
-            'total_registrations': len(registrations),
-            'approved_registrations': len(approved_registrations),
-            'paid_registrations': len(paid_registrations),
-            'revenue': sum(r.payment.jumlah for r in registrations if r.payment and r.payment.status == 'approved')
-        })
+    # Get competition statistics for export options (single aggregate query)
+    export_stats = competition_export_stats()
     
-    return render_template('admin/export.html', export_stats=export_stats)
+    return render_template('admin/export.html',
+                         export_stats=export_stats,
+                         payment_stats=get_payment_stats())
 
 
 @bp.route('/export/participants/<int:competition_id>')
@@ -361,10 +710,7 @@ def export_dashboard():
 @admin_required
 def export_participants(competition_id):
     """Export participants for a specific competition"""
-    from flask import make_response
     from app.models.competition import Competition
-    from app.models.registration import Registration
-    from app.models.payment import Payment
     
     competition = Competition.query.get_or_404(competition_id)
     
@@ -372,15 +718,9 @@ def export_participants(competition_id):
     status_filter = request.args.get('status', 'all')  # all, approved, paid
     format_type = request.args.get('format', 'excel')  # csv, excel
     
-    # Build query based on filters
-    query = Registration.query.filter_by(competition_id=competition_id)
-    
-    if status_filter == 'approved':
-        query = query.filter_by(status='approved')
-    elif status_filter == 'paid':
-        query = query.join(Payment).filter(Payment.status == 'approved')
-    
-    registrations = query.all()
+    # Whole participant graph in one query, team positions in one more
+    query = participant_export_query(competition_id, status_filter)
+    positions = team_positions(competition_id)
     
     # Prepare data
     headers = [
@@ -390,8 +730,13 @@ def export_participants(competition_id):
         'Status Pembayaran', 'Tanggal Pembayaran', 'Nama Tim', 'Posisi Tim'
     ]
     
-    data = []
-    for i, registration in enumerate(registrations, 1):
+    def participant_rows():
+        """Build export rows while fetching registrations in batches"""
+        for i, registration in enumerate(query.yield_per(EXPORT_BATCH_SIZE), 1):
+            yield participant_row(i, registration)
+    
+    def participant_row(i, registration):
+        """Build the export row of one registration"""
         user = registration.user
         profile = user.profile if user.profile else None
         payment = registration.payment
@@ -401,11 +746,7 @@ def export_participants(competition_id):
         team_position = ''
         if registration.team:
             team_name = registration.team.nama_tim
-            # Find user's position in team
-            for member in registration.team.members:
-                if member.user_id == user.id:
-                    team_position = member.get_position_display()
-                    break
+            team_position = positions.get((registration.team_id, user.id), '')
         
         row = [
             i,  # No
@@ -426,7 +767,7 @@ def export_participants(competition_id):
             team_name,
             team_position
         ]
-        data.append(row)
+        return row
     
     # Generate filename
     status_suffix = f"_{status_filter}" if status_filter != 'all' else ""
@@ -434,77 +775,17 @@ def export_participants(competition_id):
     
     if format_type == 'excel':
         try:
-            import openpyxl
-            from openpyxl.utils import get_column_letter
-            from openpyxl.styles import Font, PatternFill
-            import io
-            
-            # Create workbook and worksheet
-            wb = openpyxl.Workbook()
-            ws = wb.active
-            ws.title = f"Peserta {competition.nama_kompetisi}"
-            
-            # Add headers
-            for col, header in enumerate(headers, 1):
-                cell = ws.cell(row=1, column=col, value=header)
-                cell.font = Font(bold=True)
-                cell.fill = PatternFill(start_color="CCCCCC", end_color="CCCCCC", fill_type="solid")
-            
-            # Add data
-            for row_idx, row_data in enumerate(data, 2):
-                for col_idx, value in enumerate(row_data, 1):
-                    ws.cell(row=row_idx, column=col_idx, value=value)
-            
-            # Auto-adjust column widths
-            for column in ws.columns:
-                max_length = 0
-                column_letter = get_column_letter(column[0].column)
-                for cell in column:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                    except:
-                        pass
-                adjusted_width = min(max_length + 2, 50)
-                ws.column_dimensions[column_letter].width = adjusted_width
-            
-            # Save to bytes
-            output = io.BytesIO()
-            wb.save(output)
-            output.seek(0)
-            
             filename = f"peserta_{safe_competition_name}{status_suffix}.xlsx"
-            
-            response = make_response(output.getvalue())
-            response.headers['Content-Type'] = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-            response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
-            
-            return response
+            return stream_xlsx(headers, participant_rows(), filename, f"Peserta {competition.nama_kompetisi}")
             
         except ImportError:
             # Fallback to CSV if openpyxl is not available
             format_type = 'csv'
     
-    # CSV export (fallback or if explicitly requested)
+    # CSV export (fallback or if explicitly requested), streamed row by row
     if format_type == 'csv':
-        import csv
-        import io
-        
-        output = io.StringIO()
-        writer = csv.writer(output)
-        
-        # Write headers and data
-        writer.writerow(headers)
-        writer.writerows(data)
-        
-        output.seek(0)
         filename = f"peserta_{safe_competition_name}{status_suffix}.csv"
-        
-        response = make_response(output.getvalue())
-        response.headers['Content-Type'] = 'text/csv; charset=utf-8'
-        response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
-        
-        return response
+        return stream_csv(headers, participant_rows(), filename)
 
 
 @bp.route('/export/revenue')
@@ -512,47 +793,30 @@ def export_participants(competition_id):
 @admin_required
 def export_revenue():
     """Export revenue report"""
-    import csv
-    import io
-    from flask import make_response
-    from app.models.competition import Competition
-    from app.models.registration import Registration
-    from app.models.payment import Payment
-    
-    # Get all competitions with revenue data
-    competitions = Competition.query.all()
+    # Registration counts and revenue split of all competitions in one query
+    export_stats = competition_export_stats()
     
-    # Create CSV content
-    output = io.StringIO()
-    writer = csv.writer(output)
-    
-    # Write header
     headers = [
         'No', 'Nama Kompetisi', 'Kategori', 'Jenis', 'Harga Early Bird', 'Harga Reguler',
         'Total Registrasi', 'Registrasi Disetujui', 'Pembayaran Disetujui', 
         'Revenue Early Bird', 'Revenue Reguler', 'Total Revenue'
     ]
-    writer.writerow(headers)
-    
-    # Write data
-    total_revenue_all = 0
-    for i, competition in enumerate(competitions, 1):
-        registrations = Registration.query.filter_by(competition_id=competition.id).all()
-        approved_registrations = [r for r in registrations if r.status == 'approved']
-        paid_registrations = [r for r in registrations if r.payment and r.payment.status == 'approved']
-        
-        # Calculate revenue breakdown
-        early_bird_revenue = 0
-        regular_revenue = 0
-        
-        for registration in paid_registrations:
-            if registration.harga_terkunci == competition.harga_early_bird:
-                early_bird_revenue += registration.payment.jumlah
-            else:
-                regular_revenue += registration.payment.jumlah
+    
+    def revenue_rows():
+        """Build one row per competition followed by the total row"""
+        for i, stat in enumerate(export_stats, 1):
+            yield revenue_row(i, stat)
         
+        total_revenue_all = sum(stat['revenue'] for stat in export_stats)
+        yield []
+        yield ['TOTAL', '', '', '', '', '', '', '', '', '', '', f"Rp {total_revenue_all:,}"]
+    
+    def revenue_row(i, stat):
+        """Build the report row of one competition"""
+        competition = stat['competition']
+        early_bird_revenue = stat['early_bird_revenue']
+        regular_revenue = stat['regular_revenue']
         total_revenue = early_bird_revenue + regular_revenue
-        total_revenue_all += total_revenue
         
         row = [
             i,
@@ -561,27 +825,16 @@ def export_revenue():
             competition.get_competition_type_display(),
             f"Rp {competition.harga_early_bird:,}",
             f"Rp {competition.harga_reguler:,}",
-            len(registrations),
-            len(approved_registrations),
-            len(paid_registrations),
+            stat['total_registrations'],
+            stat['approved_registrations'],
+            stat['paid_registrations'],
             f"Rp {early_bird_revenue:,}",
             f"Rp {regular_revenue:,}",
             f"Rp {total_revenue:,}"
         ]
-        writer.writerow(row)
-    
-    # Add total row
-    writer.writerow([])
-    writer.writerow(['TOTAL', '', '', '', '', '', '', '', '', '', '', f"Rp {total_revenue_all:,}"])
-    
-    # Create response
-    output.seek(0)
-    
-    response = make_response(output.getvalue())
-    response.headers['Content-Type'] = 'text/csv; charset=utf-8'
-    response.headers['Content-Disposition'] = 'attachment; filename="laporan_revenue_kompetisi.csv"'
+        return row
     
-    return response
+    return stream_csv(headers, revenue_rows(), 'laporan_revenue_kompetisi.csv')
 
 
 @bp.route('/export/users')
@@ -589,38 +842,33 @@ def export_revenue():
 @admin_required
 def export_users():
     """Export users report"""
-    import csv
-    import io
-    from flask import make_response
     from app.models.user import User, UserProfile
     
     # Get filter parameters
     status_filter = request.args.get('status', 'all')  # all, verified, unverified
     
     # Build query based on filters
-    query = User.query.join(UserProfile).filter(UserProfile.id.isnot(None))
+    query = User.query.join(UserProfile).options(db.contains_eager(User.profile)) \
+        .filter(UserProfile.id.isnot(None))
     
     if status_filter == 'verified':
         query = query.filter(UserProfile.is_verified == True)
     elif status_filter == 'unverified':
         query = query.filter(UserProfile.is_verified == False)
     
-    users = query.all()
-    
-    # Create CSV content
-    output = io.StringIO()
-    writer = csv.writer(output)
-    
-    # Write header
     headers = [
         'No', 'Email', 'Nama Lengkap', 'Sekolah', 'Kelas', 'NISN', 
         'WhatsApp', 'Instagram', 'Twitter', 'Kelengkapan Profil (%)', 
         'Status Verifikasi', 'Tanggal Registrasi', 'Update Terakhir'
     ]
-    writer.writerow(headers)
     
-    # Write data
-    for i, user in enumerate(users, 1):
+    def user_rows():
+        """Build export rows while fetching users in batches"""
+        for i, user in enumerate(query.order_by(User.id).yield_per(EXPORT_BATCH_SIZE), 1):
+            yield user_row(i, user)
+    
+    def user_row(i, user):
+        """Build the export row of one user"""
         profile = user.profile
         
         row = [
@@ -638,19 +886,12 @@ def export_users():
             user.created_at.strftime('%d/%m/%Y %H:%M'),
             profile.updated_at.strftime('%d/%m/%Y %H:%M') if profile and profile.updated_at else ''
         ]
-        writer.writerow(row)
-    
-    # Create response
-    output.seek(0)
+        return row
     
     status_suffix = f"_{status_filter}" if status_filter != 'all' else ""
     filename = f"daftar_pengguna{status_suffix}.csv"
     
-    response = make_response(output.getvalue())
-    response.headers['Content-Type'] = 'text/csv; charset=utf-8'
-    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
-    
-    return response
+    return stream_csv(headers, user_rows(), filename)
 
 @bp.route('/kompetisi')
 @login_required
@@ -4,7 +4,7 @@ from werkzeug.utils import secure_filename
 from app.blueprints.competition import bp
 from app.models.competition import Competition
 from app.models.registration import Registration, IndividualRegistration
-from app.models.payment import Payment
+from app.models.payment import Payment, UniqueCodeUnavailable
 from app.forms.registration import IndividualRegistrationForm
 from app.utils.verification import profile_required, verification_required
 from app.utils.file_handler import save_uploaded_file, get_upload_path
@@ -231,9 +231,9 @@ def register(id):
             if form.google_drive_link.data:
                 registration.google_drive_link = form.google_drive_link.data.strip()
             
-            # Save registration
+            # Save registration together with its payment
             db.session.add(registration)
-            db.session.commit()
+            db.session.flush()  # Get registration ID
             
             # Create payment record
             payment = Payment(
@@ -241,12 +241,15 @@ def register(id):
                 jumlah=locked_price,
                 status='pending'
             )
-            db.session.add(payment)
+            payment.add_with_unique_code(registration.competition_id)
             db.session.commit()
             
-            flash(f'Pendaftaran berhasil! Harga terkunci: Rp {locked_price:,}. Silakan upload bukti pembayaran dalam 24 jam.', 'success')
+            flash(f'Pendaftaran berhasil! Total pembayaran: {payment.get_transfer_amount_display()}. Silakan upload bukti pembayaran dalam 24 jam.', 'success')
             return redirect(url_for('payment.upload_payment', payment_id=payment.id))
             
+        except UniqueCodeUnavailable as e:
+            db.session.rollback()
+            flash(str(e), 'error')
         except Exception as e:
             db.session.rollback()
             current_app.logger.error(f'Registration error: {str(e)}')
@@ -1,4 +1,4 @@
-from flask import render_template, redirect, url_for, flash, request, send_from_directory, current_app
+from flask import render_template, redirect, url_for, flash, request, send_from_directory, send_file, current_app
 from flask_login import login_required, current_user
 from app import db
 from app.blueprints.main import bp
@@ -122,4 +122,19 @@ def profil():
 def uploaded_file(subfolder, filename):
     """Serve uploaded files"""
     upload_folder = current_app.config['UPLOAD_FOLDER']
-    return send_from_directory(os.path.join(upload_folder, subfolder), filename)
\ No newline at end of file
+    return send_from_directory(os.path.join(upload_folder, subfolder), filename)
+
+@bp.route('/pratinjau/<variant>/<subfolder>/<filename>')
+@login_required
+def uploaded_file_variant(variant, subfolder, filename):
+    """Serve resized copy of an uploaded image, falling back to the original file"""
+    variant_path = FileHandler.get_image_variant(filename, subfolder, variant)
+    if not variant_path:
+        return redirect(url_for('main.uploaded_file', subfolder=subfolder, filename=filename))
+    
+    # Uploaded filenames are unique, so variants never change once generated
+    response = send_file(variant_path, mimetype='image/jpeg', max_age=FileHandler.VARIANT_MAX_AGE)
+    response.cache_control.public = False
+    response.cache_control.private = True
+    response.cache_control.immutable = True
+    return response
\ No newline at end of file
@@ -6,10 +6,10 @@ from app.models.payment import Payment
 from app.models.registration import Registration
 from app.forms.payment import PaymentUploadForm, PaymentEditForm
 from app.utils.verification import profile_required
-from app.utils.file_handler import save_payment_proof, get_upload_path
+from app.utils.file_handler import FileHandler, save_payment_proof
+from app.utils.proof_normalizer import enqueue_proof_normalization
 from datetime import datetime
 from app import db
-import os
 
 
 @bp.route('/<int:id>/upload', methods=['GET', 'POST'])
@@ -44,7 +44,7 @@ def upload_proof(id):
     if form.validate_on_submit():
         try:
             # Save payment proof file
-            filename = save_payment_proof(
+            filename, digest = save_payment_proof(
                 form.bukti_pembayaran.data,
                 payment.registration.user_id,
                 payment.registration.competition_id,
@@ -53,10 +53,12 @@ def upload_proof(id):
             
             # Update payment record
             payment.bukti_pembayaran = filename
+            payment.bukti_sha256 = digest
             payment.catatan_user = form.catatan.data
             payment.tanggal_upload = datetime.utcnow()
             
             db.session.commit()
+            enqueue_proof_normalization(payment.id, filename)
             
             flash('Bukti pembayaran berhasil diupload! Menunggu verifikasi admin.', 'success')
             return redirect(url_for('main.dashboard'))
@@ -92,14 +94,11 @@ def edit_proof(id):
     
     if form.validate_on_submit():
         try:
-            # Delete old file if exists
-            if payment.bukti_pembayaran:
-                old_file_path = get_upload_path(payment.bukti_pembayaran)
-                if os.path.exists(old_file_path):
-                    os.remove(old_file_path)
+            # Delete old file, its previews and the copy kept by normalization
+            FileHandler.delete_file(payment.bukti_pembayaran, 'payment_proofs')
             
             # Save new payment proof file
-            filename = save_payment_proof(
+            filename, digest = save_payment_proof(
                 form.bukti_pembayaran.data,
                 payment.registration.user_id,
                 payment.registration.competition_id,
@@ -108,11 +107,16 @@ def edit_proof(id):
             
             # Update payment record
             payment.bukti_pembayaran = filename
+            payment.bukti_sha256 = digest
+            # Sizes are recorded again once the new file is normalized
+            payment.bukti_original_bytes = None
+            payment.bukti_normalized_bytes = None
             payment.catatan_user = form.catatan.data
             payment.tanggal_upload = datetime.utcnow()
             payment.status = 'pending'  # Reset to pending for re-review
             
             db.session.commit()
+            enqueue_proof_normalization(payment.id, filename)
             
             flash('Bukti pembayaran berhasil diperbarui! Menunggu verifikasi ulang.', 'success')
             return redirect(url_for('main.dashboard'))
@@ -159,14 +163,14 @@ def delete_proof(id):
         return redirect(url_for('payment.view_proof', id=id))
     
     try:
-        # Delete file if exists
-        if payment.bukti_pembayaran:
-            file_path = get_upload_path(payment.bukti_pembayaran)
-            if os.path.exists(file_path):
-                os.remove(file_path)
+        # Delete file, its previews and the copy kept by normalization
+        FileHandler.delete_file(payment.bukti_pembayaran, 'payment_proofs')
         
         # Clear payment proof data
         payment.bukti_pembayaran = None
+        payment.bukti_sha256 = None
+        payment.bukti_original_bytes = None
+        payment.bukti_normalized_bytes = None
         payment.catatan_user = None
         payment.tanggal_upload = None
         
@@ -3,10 +3,11 @@ from flask_login import login_required, current_user
 from app.blueprints.team import bp
 from app.models.competition import Competition
 from app.models.registration import Team, TeamMember, TeamRegistration
-from app.models.payment import Payment
+from app.models.payment import Payment, UniqueCodeUnavailable
 from app.models.user import User
 from app.forms.team import CreateTeamForm, AddMemberForm, TeamRegistrationForm
 from app.utils.verification import profile_required
+from app.utils.search import search_user_ids
 from datetime import datetime
 from app import db
 
@@ -216,13 +217,15 @@ def register_team(id):
                 jumlah=locked_price,
                 status='pending'
             )
-            
-            db.session.add(payment)
+            payment.add_with_unique_code(registration.competition_id)
             db.session.commit()
             
-            flash(f'Tim berhasil didaftarkan! Harga terkunci: Rp {locked_price:,}. Silakan upload bukti pembayaran dalam 24 jam.', 'success')
+            flash(f'Tim berhasil didaftarkan! Total pembayaran: {payment.get_transfer_amount_display()}. Silakan upload bukti pembayaran dalam 24 jam.', 'success')
             return redirect(url_for('main.dashboard'))
             
+        except UniqueCodeUnavailable as e:
+            db.session.rollback()
+            flash(str(e), 'error')
         except Exception as e:
             db.session.rollback()
             current_app.logger.error(f'Team registration error: {str(e)}')
@@ -287,9 +290,13 @@ def search_user():
     if len(query) < 3:
         return jsonify({'users': []})
     
-    users = User.query.filter(
-        User.email.ilike(f'%{query}%')
-    ).limit(10).all()
+    # Ranked full-text search, then load the matches with their profiles
+    user_ids = search_user_ids(query, limit=10)
+    users_by_id = {
+        user.id: user
+        for user in User.query.options(db.joinedload(User.profile)).filter(User.id.in_(user_ids))
+    }
+    users = [users_by_id[user_id] for user_id in user_ids if user_id in users_by_id]
     
     user_list = []
     for user in users:
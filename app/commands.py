@@ -0,0 +1,255 @@
+import re
+import click
+from app import db
+
+
+def register_commands(app):
+    """Register maintenance CLI commands (run with `flask <command>`)"""
+
+    @app.cli.command('backfill-completion')
+    @click.option('--batch-size', default=500, show_default=True, help='Profiles per transaction')
+    def backfill_completion(batch_size):
+        """Recompute stored profile completion for existing profiles"""
+        from app.models.user import UserProfile
+
+        last_id = 0
+        checked = 0
+        changed = 0
+
+        while True:
+            profiles = UserProfile.query.filter(UserProfile.id > last_id) \
+                .order_by(UserProfile.id).limit(batch_size).all()
+            if not profiles:
+                break
+
+            for profile in profiles:
+                percentage = profile.calculate_completion_percentage()
+                if profile.verification_progress != percentage:
+                    profile.verification_progress = percentage
+                    changed += 1
+
+            checked += len(profiles)
+            last_id = profiles[-1].id
+            db.session.commit()
+
+        click.echo(f'Checked {checked} profiles, updated {changed}.')
+
+    @app.cli.command('backfill-payment-deadlines')
+    @click.option('--batch-size', default=500, show_default=True, help='Payments per transaction')
+    def backfill_payment_deadlines(batch_size):
+        """Store upload deadlines on payments created before the column existed"""
+        from app.models.payment import Payment
+        from app.models.registration import Registration
+
+        updated = 0
+
+        while True:
+            rows = db.session.execute(
+                db.select(Payment.id, Registration.tanggal_registrasi)
+                .join(Registration, Payment.registration_id == Registration.id)
+                .where(Payment.deadline_upload.is_(None), Registration.tanggal_registrasi.isnot(None))
+                .order_by(Payment.id)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                break
+
+            db.session.execute(
+                db.update(Payment).execution_options(synchronize_session=False),
+                [
+                    {'id': payment_id, 'deadline_upload': Payment.calculate_upload_deadline(tanggal_registrasi)}
+                    for payment_id, tanggal_registrasi in rows
+                ]
+            )
+            db.session.commit()
+            updated += len(rows)
+
+        click.echo(f'Stored upload deadline on {updated} payments.')
+
+    @app.cli.command('hash-payment-proofs')
+    @click.option('--batch-size', default=200, show_default=True, help='Payments per transaction')
+    def hash_payment_proofs(batch_size):
+        """Store SHA-256 digests of payment proofs uploaded before digests were recorded"""
+        import os
+        from app.models.payment import Payment
+        from app.utils.file_handler import FileHandler, get_upload_path
+
+        last_id = 0
+        hashed = 0
+        missing = 0
+
+        while True:
+            payments = Payment.query.filter(
+                Payment.id > last_id,
+                Payment.bukti_pembayaran.isnot(None),
+                Payment.bukti_sha256.is_(None)
+            ).order_by(Payment.id).limit(batch_size).all()
+            if not payments:
+                break
+
+            for payment in payments:
+                file_path = os.path.join(get_upload_path('payment_proofs'), payment.bukti_pembayaran)
+                if os.path.exists(file_path):
+                    payment.bukti_sha256 = FileHandler.file_digest(file_path)
+                    hashed += 1
+                else:
+                    missing += 1
+
+            last_id = payments[-1].id
+            db.session.commit()
+
+        click.echo(f'Hashed {hashed} payment proofs, {missing} files not found.')
+
+    @app.cli.command('normalize-payment-proofs')
+    @click.option('--batch-size', default=100, show_default=True, help='Payments per query')
+    def normalize_payment_proofs(batch_size):
+        """Re-encode JPEG/PNG payment proofs that were not normalized yet"""
+        from app.models.payment import Payment
+        from app.utils.proof_normalizer import normalize_payment_proof
+
+        last_id = 0
+        normalized = 0
+        saved_bytes = 0
+
+        while True:
+            rows = db.session.execute(
+                db.select(Payment.id, Payment.bukti_pembayaran)
+                .where(
+                    Payment.id > last_id,
+                    Payment.bukti_pembayaran.isnot(None),
+                    Payment.bukti_normalized_bytes.is_(None)
+                )
+                .order_by(Payment.id)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                break
+
+            for payment_id, filename in rows:
+                sizes = normalize_payment_proof(payment_id, filename)
+                if sizes:
+                    normalized += 1
+                    saved_bytes += sizes[0] - sizes[1]
+
+            last_id = rows[-1][0]
+
+        click.echo(f'Normalized {normalized} payment proofs, saved {saved_bytes / (1024 * 1024):.1f} MB.')
+
+    @app.cli.command('expire-payments')
+    @click.option('--batch-size', default=None, type=int, help='Payments per transaction')
+    def expire_payments(batch_size):
+        """Reject overdue payments and their registrations (run periodically, e.g. from cron)"""
+        from app.utils.sweeper import sweep_overdue_payments
+
+        result = sweep_overdue_payments(batch_size)
+        click.echo(
+            f"Expired {result['expired']} overdue payments in {result['batches']} batches "
+            f"({result['elapsed_ms']} ms)."
+        )
+
+    @app.cli.command('rebuild-revenue-rollups')
+    def rebuild_revenue_rollups():
+        """Recompute per-competition revenue rollups from approved payments"""
+        from app.models.ledger import CompetitionRevenue
+
+        competitions = CompetitionRevenue.rebuild()
+        click.echo(f'Rebuilt revenue rollups for {competitions} competitions.')
+
+    @app.cli.command('add-columns')
+    def add_columns():
+        """Add nullable columns declared on models that are missing from existing tables"""
+        added = 0
+        inspector = db.inspect(db.engine)
+
+        with db.engine.begin() as connection:
+            for table in db.metadata.sorted_tables:
+                if not inspector.has_table(table.name):
+                    continue
+                existing = {column['name'] for column in inspector.get_columns(table.name)}
+                for column in table.columns:
+                    if column.name in existing:
+                        continue
+                    if not column.nullable:
+                        click.echo(f'Skipped NOT NULL column {table.name}.{column.name}, add it manually')
+                        continue
+                    column_type = column.type.compile(dialect=db.engine.dialect)
+                    connection.exec_driver_sql(
+                        f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'
+                    )
+                    click.echo(f'Added column {table.name}.{column.name}')
+                    added += 1
+
+        click.echo(f'Added {added} missing columns.')
+
+    @app.cli.command('create-indexes')
+    def create_indexes():
+        """Create indexes declared on models that are missing from existing tables
+
+        Indexes whose definition in the database differs from the model (other
+        columns or sort directions) are dropped and created again.
+        """
+        created = 0
+        recreated = 0
+        inspector = db.inspect(db.engine)
+
+        for table in db.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {index['name']: index for index in inspector.get_indexes(table.name)}
+            stored_sql = _stored_index_sql(table.name)
+            for index in table.indexes:
+                if index.name not in existing:
+                    index.create(db.engine)
+                    click.echo(f'Created index {index.name}')
+                    created += 1
+                elif _index_changed(index, existing[index.name], stored_sql.get(index.name)):
+                    index.drop(db.engine)
+                    index.create(db.engine)
+                    click.echo(f'Recreated index {index.name}')
+                    recreated += 1
+
+        click.echo(f'Created {created} missing indexes, recreated {recreated} changed indexes.')
+
+
+def _stored_index_sql(table_name):
+    """Get CREATE INDEX statements stored by SQLite for a table (empty on other databases)"""
+    if db.engine.dialect.name != 'sqlite':
+        return {}
+
+    with db.engine.connect() as connection:
+        return dict(connection.execute(
+            db.text("SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = :table"),
+            {'table': table_name}
+        ).all())
+
+
+def _index_changed(index, reflected, stored_sql=None):
+    """
+    Check whether an existing index differs from its model declaration
+
+    SQLite reflection does not report sort directions, so there the stored
+    CREATE INDEX statement is compared with the compiled declaration. Other
+    databases compare the reflected columns and descending columns.
+    """
+    from sqlalchemy.schema import CreateIndex
+    from sqlalchemy.sql import operators
+    from sqlalchemy.sql.elements import UnaryExpression
+
+    if stored_sql is not None:
+        declared = str(CreateIndex(index).compile(dialect=db.engine.dialect))
+        normalize = lambda sql: re.sub(r'[\s"`\[\]]', '', sql).lower()
+        return normalize(stored_sql) != normalize(declared)
+
+    columns = []
+    descending = set()
+    for expression in index.expressions:
+        if isinstance(expression, UnaryExpression):
+            if expression.modifier is operators.desc_op:
+                descending.add(expression.element.name)
+            expression = expression.element
+        columns.append(getattr(expression, 'name', str(expression)))
+
+    reflected_descending = {
+        name for name, sorting in reflected.get('column_sorting', {}).items() if 'desc' in sorting
+    }
+    return columns != list(reflected['column_names']) or descending != reflected_descending
@@ -28,6 +28,40 @@ class Config:
     # Force permanent sessions
     PERMANENT_SESSION_LIFETIME = 86400  # 24 hours
     
+    # Admin list pagination
+    ADMIN_VERIFICATION_PER_PAGE = int(os.environ.get('ADMIN_VERIFICATION_PER_PAGE', 30))
+    ADMIN_PAYMENT_PER_PAGE = int(os.environ.get('ADMIN_PAYMENT_PER_PAGE', 30))
+    ADMIN_MAX_PER_PAGE = 100
+    
+    # Admin review queue: items claimed per batch and claim lease duration (minutes)
+    REVIEW_BATCH_SIZE = int(os.environ.get('REVIEW_BATCH_SIZE', 20))
+    REVIEW_LEASE_MINUTES = int(os.environ.get('REVIEW_LEASE_MINUTES', 15))
+    
+    # Overdue payment sweeper: run interval in seconds for the in-process
+    # thread started by run.py (0 disables it; under gunicorn or other WSGI
+    # servers use `flask expire-payments` from cron instead)
+    OVERDUE_SWEEP_INTERVAL = int(os.environ.get('OVERDUE_SWEEP_INTERVAL', 0))
+    OVERDUE_SWEEP_BATCH_SIZE = int(os.environ.get('OVERDUE_SWEEP_BATCH_SIZE', 500))
+    
+    # Payment proof normalization: re-encode JPEG/PNG proofs in a background
+    # thread to at most PROOF_MAX_DIMENSION pixels, optionally keeping the upload
+    PROOF_NORMALIZE = os.environ.get('PROOF_NORMALIZE', 'false').lower() == 'true'
+    PROOF_MAX_DIMENSION = int(os.environ.get('PROOF_MAX_DIMENSION', 2000))
+    PROOF_JPEG_QUALITY = int(os.environ.get('PROOF_JPEG_QUALITY', 85))
+    PROOF_KEEP_ORIGINAL = os.environ.get('PROOF_KEEP_ORIGINAL', 'false').lower() == 'true'
+    
+    # Unique payment codes: add a per-payment suffix of 1..PAYMENT_UNIQUE_CODE_MAX
+    # rupiah to the payable amount so each transfer identifies one payment
+    PAYMENT_UNIQUE_CODE = os.environ.get('PAYMENT_UNIQUE_CODE', 'false').lower() == 'true'
+    PAYMENT_UNIQUE_CODE_MAX = int(os.environ.get('PAYMENT_UNIQUE_CODE_MAX', 999))
+    
+    # Bank reconciliation: maximum hours between a transfer and the proof upload
+    # (or registration when no proof was uploaded) of a matching payment
+    RECONCILIATION_WINDOW_HOURS = int(os.environ.get('RECONCILIATION_WINDOW_HOURS', 48))
+    
+    # Lifetime of cached admin statistics (seconds)
+    STATS_CACHE_TTL = int(os.environ.get('STATS_CACHE_TTL', 60))
+    
     # Ensure upload folder exists
     os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
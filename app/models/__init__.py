@@ -2,11 +2,12 @@ from .user import User, UserProfile
 from .competition import Competition, CompetitionCategory
 from .registration import Registration, IndividualRegistration, TeamRegistration, Team, TeamMember
 from .payment import Payment
+from .ledger import PaymentLedgerEntry, CompetitionRevenue
 
 __all__ = [
     'User', 'UserProfile', 
     'Competition', 'CompetitionCategory',
     'Registration', 'IndividualRegistration', 'TeamRegistration', 
     'Team', 'TeamMember',
-    'Payment'
+    'Payment', 'PaymentLedgerEntry', 'CompetitionRevenue'
 ]
\ No newline at end of file
@@ -33,6 +33,9 @@ class Competition(db.Model):
     min_anggota = db.Column(db.Integer)  # Minimum team members
     max_anggota = db.Column(db.Integer)  # Maximum team members
     
+    # Last unique payment code handed out, see Payment.assign_unique_code
+    kode_unik_terakhir = db.Column(db.Integer, default=0)
+    
     # Timestamps
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,288 @@
+from datetime import datetime
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app import db
+
+
+class PaymentLedgerEntry(db.Model):
+    """Append-only record of payment status transitions"""
+    __tablename__ = 'payment_ledger'
+
+    id = db.Column(db.Integer, primary_key=True)
+    payment_id = db.Column(db.Integer, db.ForeignKey('payments.id'), nullable=False, index=True)
+    competition_id = db.Column(db.Integer, db.ForeignKey('competitions.id'), nullable=False, index=True)
+
+    # Transition: event is the new status, or 'expired' for the overdue sweep
+    event = db.Column(db.String(20), nullable=False)
+    status_from = db.Column(db.String(20))  # None for payments created with a final status
+    status_to = db.Column(db.String(20), nullable=False)
+
+    # Amount and price tier at the time of the transition
+    jumlah = db.Column(db.Integer, nullable=False)
+    tier = db.Column(db.String(20), nullable=False)  # early_bird, regular
+
+    admin_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+    # Maximum number of bound IDs per query (SQLite variable limit)
+    CHUNK_SIZE = 500
+
+    def __repr__(self):
+        return f'<PaymentLedgerEntry {self.id}: Payment {self.payment_id} {self.status_from} -> {self.status_to}>'
+
+    @staticmethod
+    def record_transitions(connection, transitions, event=None):
+        """
+        Append ledger entries for payment status transitions and update revenue rollups
+
+        Must run in the transaction that changed the payments, after the new
+        status is written (amounts and tiers are read from the database).
+
+        Args:
+            connection: Connection of the transaction
+            transitions: List of (payment_id, status_from, status_to)
+            event: Event name for all entries (defaults to status_to)
+
+        Returns:
+            int: Number of entries written
+        """
+        from app.models.payment import Payment
+        from app.models.registration import Registration
+        from app.models.competition import Competition
+
+        statuses = {payment_id: (status_from, status_to) for payment_id, status_from, status_to in transitions}
+        payment_ids = list(statuses)
+        now = datetime.utcnow()
+        entries = []
+
+        for start in range(0, len(payment_ids), PaymentLedgerEntry.CHUNK_SIZE):
+            chunk = payment_ids[start:start + PaymentLedgerEntry.CHUNK_SIZE]
+            rows = connection.execute(
+                db.select(
+                    Payment.id, Registration.competition_id, Payment.jumlah,
+                    CompetitionRevenue.tier_expression(), Payment.approved_by
+                )
+                .join(Registration, Payment.registration_id == Registration.id)
+                .join(Competition, Registration.competition_id == Competition.id)
+                .where(Payment.id.in_(chunk))
+            )
+            for payment_id, competition_id, jumlah, tier, admin_id in rows:
+                status_from, status_to = statuses[payment_id]
+                entries.append({
+                    'payment_id': payment_id,
+                    'competition_id': competition_id,
+                    'event': event or status_to,
+                    'status_from': status_from,
+                    'status_to': status_to,
+                    'jumlah': jumlah,
+                    'tier': tier,
+                    'admin_id': admin_id,
+                    'created_at': now
+                })
+
+        if entries:
+            connection.execute(db.insert(PaymentLedgerEntry), entries)
+            CompetitionRevenue.apply_entries(connection, entries)
+
+        return len(entries)
+
+
+class CompetitionRevenue(db.Model):
+    """Per-competition revenue of approved payments, maintained from ledger entries"""
+    __tablename__ = 'competition_revenue'
+
+    competition_id = db.Column(db.Integer, db.ForeignKey('competitions.id'), primary_key=True)
+
+    paid_count = db.Column(db.Integer, default=0, nullable=False)
+    revenue = db.Column(db.Integer, default=0, nullable=False)
+    early_bird_count = db.Column(db.Integer, default=0, nullable=False)
+    early_bird_revenue = db.Column(db.Integer, default=0, nullable=False)
+    regular_count = db.Column(db.Integer, default=0, nullable=False)
+    regular_revenue = db.Column(db.Integer, default=0, nullable=False)
+
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    COUNTERS = ('paid_count', 'revenue', 'early_bird_count', 'early_bird_revenue', 'regular_count', 'regular_revenue')
+
+    def __repr__(self):
+        return f'<CompetitionRevenue {self.competition_id}: Rp {self.revenue:,}>'
+
+    @staticmethod
+    def tier_expression():
+        """Get SQL expression classifying a registration as early_bird or regular by its locked price"""
+        from app.models.registration import Registration
+        from app.models.competition import Competition
+
+        return db.case(
+            (Registration.harga_terkunci == Competition.harga_early_bird, 'early_bird'),
+            else_='regular'
+        )
+
+    @staticmethod
+    def apply_entries(connection, entries):
+        """Add the revenue effect of ledger entries to the rollups of their competitions"""
+        deltas = {}
+        for entry in entries:
+            sign = (entry['status_to'] == 'approved') - (entry['status_from'] == 'approved')
+            if not sign:
+                continue
+            delta = deltas.setdefault(entry['competition_id'], dict.fromkeys(CompetitionRevenue.COUNTERS, 0))
+            delta['paid_count'] += sign
+            delta['revenue'] += sign * entry['jumlah']
+            delta[f"{entry['tier']}_count"] += sign
+            delta[f"{entry['tier']}_revenue"] += sign * entry['jumlah']
+
+        now = datetime.utcnow()
+        for competition_id, delta in deltas.items():
+            updated = connection.execute(
+                db.update(CompetitionRevenue)
+                .where(CompetitionRevenue.competition_id == competition_id)
+                .values(updated_at=now, **{
+                    name: getattr(CompetitionRevenue, name) + value for name, value in delta.items()
+                })
+            ).rowcount
+            if not updated:
+                connection.execute(
+                    db.insert(CompetitionRevenue).values(competition_id=competition_id, updated_at=now, **delta)
+                )
+
+    @staticmethod
+    def totals_query():
+        """
+        Get SELECT of revenue per competition computed live from approved payments
+
+        One grouped aggregate over payments, registrations and competitions;
+        the price tier is classified with a CASE on the current early bird price.
+        """
+        from app.models.payment import Payment
+        from app.models.registration import Registration
+        from app.models.competition import Competition
+
+        is_early_bird = Registration.harga_terkunci == Competition.harga_early_bird
+        return (
+            db.select(
+                Registration.competition_id,
+                db.func.count(Payment.id).label('paid_count'),
+                db.func.sum(Payment.jumlah).label('revenue'),
+                db.func.sum(db.case((is_early_bird, 1), else_=0)).label('early_bird_count'),
+                db.func.sum(db.case((is_early_bird, Payment.jumlah), else_=0)).label('early_bird_revenue'),
+            )
+            .join(Registration, Payment.registration_id == Registration.id)
+            .join(Competition, Registration.competition_id == Competition.id)
+            .where(Payment.status == 'approved')
+            .group_by(Registration.competition_id)
+        )
+
+    @staticmethod
+    def _rollup_values(rows):
+        """Turn totals_query() rows into rollup rows"""
+        now = datetime.utcnow()
+        return [
+            {
+                'competition_id': competition_id,
+                'paid_count': count,
+                'revenue': revenue or 0,
+                'early_bird_count': early_count or 0,
+                'early_bird_revenue': early_revenue or 0,
+                'regular_count': count - (early_count or 0),
+                'regular_revenue': (revenue or 0) - (early_revenue or 0),
+                'updated_at': now
+            }
+            for competition_id, count, revenue, early_count, early_revenue in rows
+        ]
+
+    @staticmethod
+    def refresh(connection, competition_ids):
+        """
+        Recompute the rollups of some competitions from approved payments
+
+        Used when changes other than status transitions (deleted payments or
+        registrations, a new early bird price) make their rollups stale.
+        """
+        from app.models.registration import Registration
+
+        competition_ids = list(competition_ids)
+        for start in range(0, len(competition_ids), PaymentLedgerEntry.CHUNK_SIZE):
+            chunk = competition_ids[start:start + PaymentLedgerEntry.CHUNK_SIZE]
+            rows = connection.execute(
+                CompetitionRevenue.totals_query().where(Registration.competition_id.in_(chunk))
+            ).all()
+            connection.execute(db.delete(CompetitionRevenue).where(CompetitionRevenue.competition_id.in_(chunk)))
+            if rows:
+                connection.execute(db.insert(CompetitionRevenue), CompetitionRevenue._rollup_values(rows))
+
+    @staticmethod
+    def rebuild():
+        """
+        Recompute all rollups from approved payments
+
+        Run once on databases created before the ledger existed.
+
+        Returns:
+            int: Number of competitions with revenue
+        """
+        rows = db.session.execute(CompetitionRevenue.totals_query()).all()
+
+        db.session.execute(db.delete(CompetitionRevenue))
+        if rows:
+            db.session.execute(db.insert(CompetitionRevenue), CompetitionRevenue._rollup_values(rows))
+        db.session.commit()
+
+        return len(rows)
+
+
+def track_stale_revenue(session, flush_context, instances):
+    """Remember competitions whose rollups the pending flush makes stale"""
+    from app.models.payment import Payment
+    from app.models.registration import Registration
+    from app.models.competition import Competition
+
+    stale = set()
+    for obj in session.deleted:
+        if isinstance(obj, Registration):
+            stale.add(obj.competition_id)
+        elif isinstance(obj, Payment) and obj.registration is not None:
+            stale.add(obj.registration.competition_id)
+    for obj in session.dirty:
+        # Revenue tiers are classified by the early bird price
+        if isinstance(obj, Competition) and db.inspect(obj).attrs.harga_early_bird.history.has_changes():
+            stale.add(obj.id)
+
+    if stale:
+        session.info.setdefault('stale_revenue', set()).update(stale)
+
+
+def record_payment_transitions(session, flush_context):
+    """Write ledger entries for payment status changes made through the ORM and refresh stale rollups"""
+    from app.models.payment import Payment
+
+    transitions = []
+    for payment in session.new | session.dirty:
+        if not isinstance(payment, Payment):
+            continue
+        history = db.inspect(payment).attrs.status.history
+        if payment in session.new:
+            if payment.status not in (None, 'pending'):
+                transitions.append((payment.id, None, payment.status))
+        elif history.has_changes():
+            status_from = history.deleted[0] if history.deleted else None
+            if status_from != payment.status:
+                transitions.append((payment.id, status_from, payment.status))
+
+    if transitions:
+        PaymentLedgerEntry.record_transitions(session.connection(), transitions)
+
+    stale = session.info.pop('stale_revenue', None)
+    if stale:
+        CompetitionRevenue.refresh(session.connection(), stale)
+
+
+def register_ledger_listeners():
+    """Hook ledger entries and revenue rollup upkeep into SQLAlchemy session events"""
+    listeners = (
+        ('before_flush', track_stale_revenue),
+        ('after_flush', record_payment_transitions),
+    )
+    for name, listener in listeners:
+        if not event.contains(Session, name, listener):
+            event.listen(Session, name, listener)
@@ -1,18 +1,28 @@
 from datetime import datetime, timedelta
+from flask import current_app
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.exc import IntegrityError
 from app import db
 
 
+class UniqueCodeUnavailable(ValueError):
+    """Raised when every unique payment code for an amount is in use"""
+
+
 class Payment(db.Model):
     """Payment model for competition registrations"""
     __tablename__ = 'payments'
     
     id = db.Column(db.Integer, primary_key=True)
-    registration_id = db.Column(db.Integer, db.ForeignKey('registrations.id'), nullable=False)
+    registration_id = db.Column(db.Integer, db.ForeignKey('registrations.id'), nullable=False, index=True)
     
     # Payment information
     jumlah = db.Column(db.Integer, nullable=False)  # Amount in rupiah
+    kode_unik = db.Column(db.Integer)  # Unique code included in jumlah, identifies the transfer
     bukti_pembayaran = db.Column(db.String(200))  # Payment proof file path
+    bukti_sha256 = db.Column(db.String(64), index=True)  # SHA-256 of the proof file, finds reused proofs
+    bukti_original_bytes = db.Column(db.Integer)  # Proof size as uploaded, set by normalization
+    bukti_normalized_bytes = db.Column(db.Integer)  # Proof size after normalization
     catatan_user = db.Column(db.Text)  # User notes when uploading proof
     
     # Payment status
@@ -26,6 +36,32 @@ class Payment(db.Model):
     # Timestamps
     tanggal_upload = db.Column(db.DateTime, default=datetime.utcnow)
     tanggal_approval = db.Column(db.DateTime)
+    deadline_upload = db.Column(db.DateTime)  # Proof upload deadline, stored when the payment is created
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)  # Delta-sync watermark
+    
+    # Review queue lease; claimed_by is the admin's user ID (no foreign key, keeps joins with users unambiguous)
+    claimed_by = db.Column(db.Integer, nullable=True)
+    claim_expires_at = db.Column(db.DateTime)
+    
+    __table_args__ = (
+        db.Index('ix_payments_claim', 'claimed_by', 'claim_expires_at'),
+        # Admin payment list: filter by status, keyset paginate by upload date
+        db.Index('ix_payments_status_upload', 'status', 'tanggal_upload', 'id'),
+        # Overdue sweep: pending payments past their upload deadline
+        db.Index('ix_payments_status_deadline', 'status', 'deadline_upload'),
+        # Transfer lookup: pending payment by exact amount
+        db.Index('ix_payments_status_jumlah', 'status', 'jumlah'),
+        # A unique code identifies one pending transfer amount, so no two
+        # pending payments with a code may share their amount
+        db.Index(
+            'uq_payments_pending_coded_jumlah', 'jumlah', unique=True,
+            sqlite_where=db.text("status = 'pending' AND kode_unik IS NOT NULL"),
+            postgresql_where=db.text("status = 'pending' AND kode_unik IS NOT NULL")
+        ),
+    )
+    
+    # Hours after registration to upload the payment proof
+    UPLOAD_DEADLINE_HOURS = 24
     
     def __repr__(self):
         return f'<Payment {self.id}: {self.jumlah} - {self.status}>'
@@ -49,18 +85,15 @@ class Payment(db.Model):
     
     def is_within_deadline(self):
         """Check if payment is within 24-hour deadline"""
-        if not self.registration:
+        deadline = self.get_upload_deadline()
+        if not deadline:
             return False
         
-        deadline = self.registration.tanggal_registrasi + timedelta(hours=24)
         return datetime.utcnow() <= deadline
     
     def get_deadline(self):
         """Get payment deadline (24 hours after registration)"""
-        if not self.registration:
-            return None
-        
-        return self.registration.tanggal_registrasi + timedelta(hours=24)
+        return self.get_upload_deadline()
     
     def is_overdue(self):
         """Check if payment is overdue"""
@@ -70,39 +103,48 @@ class Payment(db.Model):
         
         return datetime.utcnow() > deadline
     
-    def approve_payment(self, admin_user_id, notes=None):
-        """Approve the payment"""
+    def approve_payment(self, admin_user_id, notes=None, commit=True):
+        """Approve the payment (pass commit=False to batch several changes in one transaction)"""
         self.status = 'approved'
         self.approved_by = admin_user_id
         self.tanggal_approval = datetime.utcnow()
+        self.release_claim()
         
         if notes:
             self.admin_notes = notes
         
         # Also approve the associated registration
         if self.registration:
-            self.registration.approve_registration(admin_user_id)
+            self.registration.approve_registration(admin_user_id, commit=False)
         
-        db.session.commit()
+        if commit:
+            db.session.commit()
         
         return True, "Pembayaran berhasil disetujui"
     
-    def reject_payment(self, admin_user_id, notes=None):
-        """Reject the payment"""
+    def reject_payment(self, admin_user_id, notes=None, commit=True):
+        """Reject the payment (pass commit=False to batch several changes in one transaction)"""
         self.status = 'rejected'
         self.approved_by = admin_user_id
+        self.release_claim()
         
         if notes:
             self.admin_notes = notes
         
         # Also reject the associated registration
         if self.registration:
-            self.registration.reject_registration(admin_user_id)
+            self.registration.reject_registration(admin_user_id, commit=False)
         
-        db.session.commit()
+        if commit:
+            db.session.commit()
         
         return True, "Pembayaran ditolak"
     
+    def release_claim(self):
+        """Release review queue claim"""
+        self.claimed_by = None
+        self.claim_expires_at = None
+    
     def get_status_display(self):
         """Get human-readable status"""
         status_mapping = {
@@ -116,6 +158,12 @@ class Payment(db.Model):
         """Get formatted amount in rupiah"""
         return f"Rp {self.jumlah:,}".replace(',', '.')
     
+    def get_transfer_amount_display(self):
+        """Get formatted amount to transfer, mentioning the unique code it includes"""
+        if self.kode_unik:
+            return f"{self.get_formatted_amount()} (termasuk kode unik {self.kode_unik})"
+        return self.get_formatted_amount()
+    
     def get_time_left(self):
         """Get time left until deadline"""
         deadline = self.get_deadline()
@@ -150,50 +198,369 @@ class Payment(db.Model):
     
     def validate_amount(self):
         """Validate if payment amount matches expected amount"""
-        expected_amount = self.calculate_amount()
+        expected_amount = self.calculate_amount() + (self.kode_unik or 0)
         return self.jumlah == expected_amount
     
+    def assign_unique_code(self, competition_id):
+        """
+        Add a unique code to the payable amount when PAYMENT_UNIQUE_CODE is enabled
+        
+        A single UPDATE ... RETURNING on the competition picks the next code
+        after the last one handed out whose total amount is not used by any
+        pending payment (anti-join against pending jumlah values at this base
+        price) and stores it as the new counter. The UPDATE holds the write
+        lock, so concurrent registrations never get the same code. Must be
+        called before jumlah is flushed.
+        
+        Returns:
+            int: Assigned code, or None if disabled
+        
+        Raises:
+            UniqueCodeUnavailable: If every code is used by a pending payment
+        """
+        from app.models.competition import Competition
+        
+        if not current_app.config.get('PAYMENT_UNIQUE_CODE'):
+            return None
+        
+        max_code = current_app.config['PAYMENT_UNIQUE_CODE_MAX']
+        base_amount = self.jumlah
+        
+        codes = db.select(db.literal(1).label('code')).cte('codes', recursive=True)
+        codes = codes.union_all(db.select(codes.c.code + 1).where(codes.c.code < max_code))
+        taken = db.select(Payment.jumlah - base_amount).where(
+            Payment.status == 'pending',
+            Payment.jumlah.between(base_amount + 1, base_amount + max_code)
+        )
+        free_codes = codes.c.code.not_in(taken)
+        last_code = db.func.coalesce(Competition.kode_unik_terakhir, 0)
+        # Round-robin: the first free code after the last one handed out, else the lowest free code
+        next_free = db.func.coalesce(
+            db.select(db.func.min(codes.c.code)).where(free_codes, codes.c.code > last_code)
+            .correlate(Competition).scalar_subquery(),
+            db.select(db.func.min(codes.c.code)).where(free_codes).scalar_subquery()
+        )
+        
+        code = db.session.scalar(
+            db.update(Competition)
+            .where(Competition.id == competition_id)
+            .values(kode_unik_terakhir=next_free, updated_at=Competition.updated_at)
+            .returning(Competition.kode_unik_terakhir)
+            .execution_options(synchronize_session=False)
+        )
+        if code is None:
+            raise UniqueCodeUnavailable(
+                'Kode unik pembayaran untuk nominal ini sedang habis. Silakan coba lagi nanti.'
+            )
+        
+        self.kode_unik = code
+        self.jumlah = base_amount + code
+        return code
+    
+    # Attempts to add a payment when a concurrent registration took the same code
+    UNIQUE_CODE_ATTEMPTS = 3
+    
+    def add_with_unique_code(self, competition_id):
+        """
+        Assign a unique code and flush the payment, retrying on code collisions
+        
+        Each attempt runs in a savepoint; if a concurrent registration
+        committed the same amount first, the unique index rejects the flush and
+        a new code is picked.
+        
+        Returns:
+            int: Assigned code, or None if disabled
+        
+        Raises:
+            UniqueCodeUnavailable: If every code is used by a pending payment
+        """
+        base_amount = self.jumlah
+        for attempt in range(Payment.UNIQUE_CODE_ATTEMPTS):
+            self.jumlah = base_amount
+            try:
+                with db.session.begin_nested():
+                    code = self.assign_unique_code(competition_id)
+                    db.session.add(self)
+                    db.session.flush()
+                return code
+            except IntegrityError:
+                if attempt + 1 == Payment.UNIQUE_CODE_ATTEMPTS:
+                    raise
+    
+    @staticmethod
+    def find_by_transfer_amount(jumlah):
+        """Get the pending payment with exactly this amount (index lookup), or None"""
+        return Payment.query.filter(Payment.status == 'pending', Payment.jumlah == jumlah) \
+            .order_by(Payment.id).first()
+    
+    # Maximum number of bound IDs per query (SQLite variable limit)
+    BULK_CHUNK_SIZE = 500
+    
+    @staticmethod
+    def bulk_review(payment_ids, action, admin_user_id, notes=None):
+        """
+        Approve or reject many payments in a single transaction
+        
+        The pending payments among the requested IDs are selected once, then
+        payments, their registrations and the ledger are updated by that ID
+        list with set-based statements per chunk of BULK_CHUNK_SIZE IDs.
+        No ORM objects are loaded.
+        
+        Args:
+            payment_ids: List of payment IDs
+            action: 'approve' or 'reject'
+            admin_user_id: ID of the admin taking the action
+            notes: Admin notes stored on every payment
+        
+        Returns:
+            dict: Payment ID -> (success, message) for every requested ID
+        """
+        from app.models.registration import Registration
+        from app.models.ledger import PaymentLedgerEntry
+        from app.utils.statistics import invalidate_payment_stats
+        
+        if action not in ('approve', 'reject'):
+            raise ValueError(f'Unknown payment action: {action}')
+        
+        payment_ids = list(dict.fromkeys(payment_ids))
+        statuses = {}
+        for start in range(0, len(payment_ids), Payment.BULK_CHUNK_SIZE):
+            chunk = payment_ids[start:start + Payment.BULK_CHUNK_SIZE]
+            statuses.update(db.session.execute(
+                db.select(Payment.id, Payment.status).where(Payment.id.in_(chunk))
+            ).all())
+        
+        # Same bookkeeping as approve_payment() / reject_payment()
+        now = datetime.utcnow()
+        if action == 'approve':
+            status, message = 'approved', "Pembayaran berhasil disetujui"
+            payment_values = {'tanggal_approval': now}
+            registration_values = {'status': status, 'tanggal_approval': now}
+        else:
+            status, message = 'rejected', "Pembayaran ditolak"
+            payment_values = {}
+            registration_values = {'status': status}
+        payment_values.update(status=status, approved_by=admin_user_id, claimed_by=None, claim_expires_at=None)
+        if notes:
+            payment_values['admin_notes'] = notes
+        
+        target_ids = [payment_id for payment_id in payment_ids if statuses.get(payment_id) == 'pending']
+        reviewed_ids = set()
+        for start in range(0, len(target_ids), Payment.BULK_CHUNK_SIZE):
+            chunk = target_ids[start:start + Payment.BULK_CHUNK_SIZE]
+            # The status guard skips payments reviewed since the SELECT
+            chunk_ids = db.session.scalars(
+                db.update(Payment)
+                .where(Payment.id.in_(chunk), Payment.status == 'pending')
+                .values(**payment_values)
+                .returning(Payment.id)
+                .execution_options(synchronize_session=False)
+            ).all()
+            if not chunk_ids:
+                continue
+            db.session.execute(
+                db.update(Registration)
+                .where(Registration.id.in_(db.select(Payment.registration_id).where(Payment.id.in_(chunk_ids))))
+                .values(**registration_values)
+                .execution_options(synchronize_session=False)
+            )
+            # Bulk UPDATEs bypass the flush listener writing the ledger
+            PaymentLedgerEntry.record_transitions(
+                db.session.connection(),
+                [(payment_id, 'pending', status) for payment_id in chunk_ids]
+            )
+            reviewed_ids.update(chunk_ids)
+        
+        db.session.commit()
+        
+        # Bulk UPDATEs bypass the flush events that invalidate cached statistics
+        if reviewed_ids:
+            invalidate_payment_stats()
+        
+        outcomes = {}
+        for payment_id in payment_ids:
+            if payment_id in reviewed_ids:
+                outcomes[payment_id] = (True, message)
+            elif payment_id not in statuses:
+                outcomes[payment_id] = (False, "Pembayaran tidak ditemukan")
+            else:
+                outcomes[payment_id] = (False, "Pembayaran sudah diproses")
+        
+        return outcomes
+    
+    @staticmethod
+    def find_shared_proofs(payments):
+        """
+        Find other payments whose proof file has the same content
+        
+        Args:
+            payments: Payments to check (e.g. one page of the admin list)
+        
+        Returns:
+            dict: Payment ID -> list of other payment IDs with the same proof digest
+                  (only payments that share their proof are included)
+        """
+        digests = {payment.bukti_sha256 for payment in payments if payment.bukti_sha256}
+        if not digests:
+            return {}
+        
+        ids_by_digest = {}
+        rows = db.session.execute(
+            db.select(Payment.bukti_sha256, Payment.id)
+            .where(Payment.bukti_sha256.in_(digests))
+            .order_by(Payment.id)
+        )
+        for digest, payment_id in rows:
+            ids_by_digest.setdefault(digest, []).append(payment_id)
+        
+        shared = {}
+        for payment in payments:
+            others = [payment_id for payment_id in ids_by_digest.get(payment.bukti_sha256, ())
+                      if payment_id != payment.id]
+            if others:
+                shared[payment.id] = others
+        return shared
+    
+    @staticmethod
+    def review_queue_filter():
+        """Get WHERE clause for payments waiting in the review queue"""
+        return db.and_(
+            Payment.status == 'pending',
+            Payment.bukti_pembayaran.isnot(None),
+            Payment.tanggal_upload.isnot(None)
+        )
+    
     @staticmethod
     def get_pending_payments():
         """Get all pending payments for admin review"""
         return Payment.query.filter_by(status='pending').order_by(Payment.tanggal_upload.desc()).all()
     
+    # Admin note stored on payments rejected by the overdue sweep
+    OVERDUE_NOTE = 'Otomatis ditolak karena melewati batas waktu 24 jam'
+    
     @staticmethod
-    def get_overdue_payments():
-        """Get all overdue payments"""
+    def overdue_filter():
+        """
+        Get WHERE clause for overdue payments
+        
+        Only payments still waiting for their proof are overdue; uploaded
+        proofs wait for admin review regardless of the upload deadline.
+        Payments created before the deadline was stored fall back to the
+        deadline computed from their registration date.
+        """
         from app.models.registration import Registration
-        cutoff_time = datetime.utcnow() - timedelta(hours=24)
         
-        return db.session.query(Payment).join(Registration).filter(
+        now = datetime.utcnow()
+        registered_before = db.select(Registration.id).where(
+            Registration.tanggal_registrasi < now - timedelta(hours=Payment.UPLOAD_DEADLINE_HOURS)
+        )
+        return db.and_(
             Payment.status == 'pending',
-            Registration.tanggal_registrasi < cutoff_time
-        ).all()
+            Payment.bukti_pembayaran.is_(None),
+            db.or_(
+                Payment.deadline_upload < now,
+                db.and_(Payment.deadline_upload.is_(None), Payment.registration_id.in_(registered_before))
+            )
+        )
     
     @staticmethod
-    def cleanup_overdue_payments():
-        """Mark overdue payments as rejected"""
-        overdue_payments = Payment.get_overdue_payments()
+    def get_overdue_payments():
+        """Get all overdue payments"""
+        return Payment.query.filter(Payment.overdue_filter()).all()
+    
+    @staticmethod
+    def expire_overdue_payments(batch_size=None):
+        """
+        Reject overdue payments and their registrations with set-based UPDATEs
         
-        for payment in overdue_payments:
-            payment.status = 'rejected'
-            payment.admin_notes = 'Otomatis ditolak karena melewati batas waktu 24 jam'
+        Works through the overdue payments in batches of batch_size rows,
+        committing after each batch so locks are held only briefly.
+        
+        Args:
+            batch_size: Payments per batch (defaults to BULK_CHUNK_SIZE)
+        
+        Returns:
+            tuple: (number of expired payments, number of batches)
+        """
+        from app.models.registration import Registration
+        from app.models.ledger import PaymentLedgerEntry
+        from app.utils.statistics import invalidate_payment_stats
+        
+        batch_size = batch_size or Payment.BULK_CHUNK_SIZE
+        expired = 0
+        batches = 0
+        
+        while True:
+            payment_ids = db.session.scalars(
+                db.select(Payment.id)
+                .where(Payment.overdue_filter())
+                .order_by(Payment.id)
+                .limit(batch_size)
+            ).all()
+            if not payment_ids:
+                break
+            
+            # Re-check the state so payments changed since the SELECT are skipped;
+            # RETURNING gives exactly the rows this UPDATE expired
+            expired_ids = db.session.scalars(
+                db.update(Payment)
+                .where(Payment.id.in_(payment_ids), Payment.status == 'pending', Payment.bukti_pembayaran.is_(None))
+                .values(status='rejected', admin_notes=Payment.OVERDUE_NOTE, claimed_by=None, claim_expires_at=None)
+                .returning(Payment.id)
+                .execution_options(synchronize_session=False)
+            ).all()
+            if expired_ids:
+                db.session.execute(
+                    db.update(Registration)
+                    .where(Registration.id.in_(
+                        db.select(Payment.registration_id).where(Payment.id.in_(expired_ids))
+                    ))
+                    .values(status='rejected')
+                    .execution_options(synchronize_session=False)
+                )
+                # Bulk UPDATEs bypass the flush listener writing the ledger
+                PaymentLedgerEntry.record_transitions(
+                    db.session.connection(),
+                    [(payment_id, 'pending', 'rejected') for payment_id in expired_ids],
+                    event='expired'
+                )
+            expired += len(expired_ids)
+            db.session.commit()
+            batches += 1
             
-            if payment.registration:
-                payment.registration.status = 'rejected'
+            if len(payment_ids) < batch_size:
+                break
         
-        db.session.commit()
+        # Bulk UPDATEs bypass the flush events that invalidate cached statistics
+        if expired:
+            invalidate_payment_stats()
         
-        return len(overdue_payments)
+        return expired, batches
+    
+    @staticmethod
+    def cleanup_overdue_payments():
+        """Mark overdue payments as rejected"""
+        expired, _ = Payment.expire_overdue_payments()
+        return expired
     
     def get_amount_display(self):
         """Get formatted amount display"""
         return f"Rp {self.jumlah:,}"
     
+    @staticmethod
+    def calculate_upload_deadline(tanggal_registrasi):
+        """Get upload deadline for a registration date"""
+        return tanggal_registrasi + timedelta(hours=Payment.UPLOAD_DEADLINE_HOURS)
+    
     def get_upload_deadline(self):
         """Get upload deadline (24 hours after registration)"""
+        if self.deadline_upload:
+            return self.deadline_upload
+        
+        # Payments created before the deadline was stored
         if not self.registration:
             return None
-        return self.registration.tanggal_registrasi + timedelta(hours=24)
+        return Payment.calculate_upload_deadline(self.registration.tanggal_registrasi)
     
     def is_upload_deadline_passed(self):
         """Check if upload deadline has passed"""
@@ -218,4 +585,19 @@ class Payment(db.Model):
         if hours > 0:
             return f"{hours} jam {minutes} menit"
         else:
-            return f"{minutes} menit"
\ No newline at end of file
+            return f"{minutes} menit"
+
+
+@db.event.listens_for(Payment, 'before_insert')
+def set_upload_deadline(mapper, connection, payment):
+    """Store upload deadline from the registration date when a payment is created"""
+    if payment.deadline_upload is not None:
+        return
+    
+    from app.models.registration import Registration
+    
+    # Registrations are flushed before their payments, so read the date directly
+    tanggal_registrasi = connection.scalar(
+        db.select(Registration.tanggal_registrasi).where(Registration.id == payment.registration_id)
+    )
+    payment.deadline_upload = Payment.calculate_upload_deadline(tanggal_registrasi or datetime.utcnow())
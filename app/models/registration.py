@@ -23,12 +23,17 @@ class Registration(db.Model):
     google_drive_link = db.Column(db.String(500))  # For creative/performance competitions
     
     # Timestamps
-    tanggal_registrasi = db.Column(db.DateTime, default=datetime.utcnow)
+    tanggal_registrasi = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     tanggal_approval = db.Column(db.DateTime)
     
     # Relationships
     payment = db.relationship('Payment', backref='registration', uselist=False, cascade='all, delete-orphan')
     
+    __table_args__ = (
+        # Export statistics: registrations counted per competition and status
+        db.Index('ix_registrations_competition_status', 'competition_id', 'status'),
+    )
+    
     def __repr__(self):
         return f'<Registration {self.id}: User {self.user_id} -> Competition {self.competition_id}>'
     
@@ -59,16 +64,18 @@ class Registration(db.Model):
         """Check if submission is overdue"""
         return datetime.utcnow() > self.get_submission_deadline()
     
-    def approve_registration(self, admin_user_id=None):
+    def approve_registration(self, admin_user_id=None, commit=True):
         """Approve the registration"""
         self.status = 'approved'
         self.tanggal_approval = datetime.utcnow()
-        db.session.commit()
+        if commit:
+            db.session.commit()
     
-    def reject_registration(self, admin_user_id=None):
+    def reject_registration(self, admin_user_id=None, commit=True):
         """Reject the registration"""
         self.status = 'rejected'
-        db.session.commit()
+        if commit:
+            db.session.commit()
     
     def get_type(self):
         """Get registration type (individual or team)"""
@@ -27,6 +27,23 @@ class User(UserMixin, db.Model):
     def __repr__(self):
         return f'<User {self.email}>'
     
+    @staticmethod
+    def load_identity(user_id):
+        """
+        Load user together with profile in one query
+        
+        Used by the Flask-Login user loader so the identity for the request
+        (current_user and current_user.profile) costs a single query.
+        """
+        try:
+            user_id = int(user_id)
+        except (TypeError, ValueError):
+            return None
+        
+        return db.session.execute(
+            db.select(User).options(db.joinedload(User.profile)).where(User.id == user_id)
+        ).unique().scalar_one_or_none()
+    
     def set_password(self, password):
         """Hash and set password"""
         self.password_hash = generate_password_hash(password)
@@ -39,13 +56,13 @@ class User(UserMixin, db.Model):
         """Check if user profile is 100% complete"""
         if not self.profile:
             return False
-        return self.profile.calculate_completion_percentage() == 100
+        return self.profile.get_completion_percentage() == 100
     
     def get_verification_progress(self):
         """Get verification progress percentage (0-100)"""
         if not self.profile:
             return 0
-        return self.profile.calculate_completion_percentage()
+        return self.profile.get_completion_percentage()
 
 
 class UserProfile(db.Model):
@@ -72,42 +89,56 @@ class UserProfile(db.Model):
     
     # Verification status
     is_verified = db.Column(db.Boolean, default=False, nullable=False)
-    verification_progress = db.Column(db.Integer, default=0)  # 0-100 percentage
+    verification_progress = db.Column(db.Integer, default=0, index=True)  # 0-100 percentage, kept up to date on save
+    
+    reviewed_at = db.Column(db.DateTime)  # Last verification decision by an admin
+    
+    # Review queue lease; claimed_by is the admin's user ID (no foreign key, keeps joins with users unambiguous)
+    claimed_by = db.Column(db.Integer, nullable=True)
+    claim_expires_at = db.Column(db.DateTime)
     
     # Timestamps
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)  # Delta-sync watermark
+    
+    # Composite index backing the admin verification queue (keyset pagination);
+    # column directions match VERIFICATION_QUEUE_ORDER so pages are read without a sort
+    __table_args__ = (
+        db.Index('ix_user_profiles_verification_queue',
+                 is_verified, verification_progress.desc(), created_at.desc(), id.desc()),
+        db.Index('ix_user_profiles_claim', 'claimed_by', 'claim_expires_at'),
+    )
     
     def __repr__(self):
         return f'<UserProfile {self.nama_lengkap or "Incomplete"}>'
     
+    # Fields that count towards profile completion
+    REQUIRED_FIELDS = [
+        'nama_lengkap',
+        'sekolah', 
+        'kelas',
+        'nisn',
+        'whatsapp',
+        'instagram',
+        'foto_kartu_pelajar',
+        'screenshot_twibbon'
+    ]
+    
     def calculate_completion_percentage(self):
         """Calculate profile completion percentage based on required fields"""
-        required_fields = [
-            'nama_lengkap',
-            'sekolah', 
-            'kelas',
-            'nisn',
-            'whatsapp',
-            'instagram',
-            'foto_kartu_pelajar',
-            'screenshot_twibbon'
-        ]
-        
         completed_fields = 0
-        total_fields = len(required_fields)
+        total_fields = len(UserProfile.REQUIRED_FIELDS)
         
-        for field in required_fields:
+        for field in UserProfile.REQUIRED_FIELDS:
             value = getattr(self, field)
             if value is not None and str(value).strip():
                 completed_fields += 1
         
-        percentage = int((completed_fields / total_fields) * 100)
-        
-        # Update verification_progress field
-        self.verification_progress = percentage
-        
-        return percentage
+        return int((completed_fields / total_fields) * 100)
+    
+    def get_completion_percentage(self):
+        """Get stored completion percentage (maintained whenever the profile is saved)"""
+        return self.verification_progress or 0
     
     def get_missing_fields(self):
         """Get list of missing required fields with Indonesian labels"""
@@ -139,4 +170,75 @@ class UserProfile(db.Model):
     
     def get_display_name(self):
         """Get display name for user"""
-        return self.nama_lengkap or self.user.email.split('@')[0]
\ No newline at end of file
+        return self.nama_lengkap or self.user.email.split('@')[0]
+    
+    def record_review(self, is_verified):
+        """Store an admin verification decision and release the review queue claim"""
+        now = datetime.utcnow()
+        self.is_verified = is_verified
+        self.reviewed_at = now
+        # Same timestamp on both, so the profile only re-enters the queue once edited
+        self.updated_at = now
+        self.claimed_by = None
+        self.claim_expires_at = None
+    
+    @staticmethod
+    def review_queue_filter():
+        """Get WHERE clause for complete, unverified profiles not reviewed since their last edit"""
+        return db.and_(
+            UserProfile.is_verified == False,
+            UserProfile.verification_progress == 100,
+            db.or_(UserProfile.reviewed_at.is_(None), UserProfile.updated_at > UserProfile.reviewed_at)
+        )
+    
+    # Maximum number of bound IDs per UPDATE (SQLite variable limit)
+    BULK_CHUNK_SIZE = 500
+    
+    @staticmethod
+    def bulk_set_verification(user_ids, is_verified):
+        """
+        Set verification status of many users with set-based UPDATE statements
+        
+        Approval only touches 100% complete profiles, so incomplete ones are
+        left as they are. Review queue claims on updated profiles are released.
+        A SELECT is run once to get the user IDs, then profiles are updated by
+        ID in chunks of BULK_CHUNK_SIZE. No ORM objects are loaded.
+        
+        Args:
+            user_ids: List of user IDs, or a SELECT returning user IDs
+            is_verified: New verification status
+        
+        Returns:
+            int: Number of profiles updated
+        """
+        if not isinstance(user_ids, (list, tuple, set)):
+            user_ids = db.session.scalars(user_ids).all()
+        user_ids = list(user_ids)
+        now = datetime.utcnow()
+        
+        updated = 0
+        for start in range(0, len(user_ids), UserProfile.BULK_CHUNK_SIZE):
+            chunk = user_ids[start:start + UserProfile.BULK_CHUNK_SIZE]
+            # Same bookkeeping as record_review()
+            stmt = db.update(UserProfile).where(UserProfile.user_id.in_(chunk)).values(
+                is_verified=is_verified, reviewed_at=now, updated_at=now,
+                claimed_by=None, claim_expires_at=None
+            )
+            if is_verified:
+                stmt = stmt.where(UserProfile.verification_progress == 100)
+            updated += db.session.execute(stmt.execution_options(synchronize_session=False)).rowcount
+        
+        db.session.commit()
+        
+        # Bulk UPDATEs bypass the flush events that invalidate cached statistics
+        from app.utils.statistics import invalidate_verification_stats
+        invalidate_verification_stats()
+        
+        return updated
+
+
+@db.event.listens_for(UserProfile, 'before_insert')
+@db.event.listens_for(UserProfile, 'before_update')
+def update_completion_percentage(mapper, connection, profile):
+    """Store completion percentage whenever a profile is written"""
+    profile.verification_progress = profile.calculate_completion_percentage()
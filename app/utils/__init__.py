@@ -4,4 +4,5 @@ from app.utils.verification import (
     verification_required, 
     ProfileVerificationHelper, 
     check_competition_eligibility
-)
\ No newline at end of file
+)
+from app.utils.pagination import KeysetPage, keyset_paginate
\ No newline at end of file
@@ -0,0 +1,158 @@
+import csv
+import io
+import os
+import tempfile
+from itertools import islice
+from flask import Response, send_file, stream_with_context
+
+# Rows fetched per round trip when streaming exports
+EXPORT_BATCH_SIZE = 500
+
+# Approximate number of characters buffered before a chunk is sent
+CSV_CHUNK_SIZE = 64 * 1024
+
+# Rows used to size XLSX columns, and the widest column allowed
+XLSX_WIDTH_SAMPLE_ROWS = EXPORT_BATCH_SIZE
+XLSX_MAX_COLUMN_WIDTH = 50
+
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+def iter_csv(headers, rows):
+    """
+    Encode rows as CSV text chunks
+
+    The header line is yielded on its own so the download starts right
+    away; data rows are sent in chunks of about CSV_CHUNK_SIZE characters.
+
+    Args:
+        headers: Header row
+        rows: Iterable of data rows, consumed lazily
+
+    Yields:
+        str: CSV text
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    writer.writerow(headers)
+    yield buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= CSV_CHUNK_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def stream_csv(headers, rows, filename):
+    """
+    Get a streaming CSV download response
+
+    The request context stays open while streaming, so rows may come from a
+    query iterated with yield_per(EXPORT_BATCH_SIZE).
+
+    Args:
+        headers: Header row
+        rows: Iterable of data rows, consumed lazily
+        filename: Download filename
+
+    Returns:
+        Response: Streaming text/csv response
+    """
+    response = Response(stream_with_context(iter_csv(headers, rows)), mimetype='text/csv')
+    response.headers['Content-Type'] = 'text/csv; charset=utf-8'
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def stream_xlsx(headers, rows, filename, sheet_title):
+    """
+    Get an XLSX download written with openpyxl's write-only mode
+
+    Rows are written straight to a temporary file instead of being kept as
+    cells in memory, and the finished file is streamed from disk. Write-only
+    sheets need their column widths before the first row, so widths are
+    sized from the header and the first XLSX_WIDTH_SAMPLE_ROWS rows, which
+    are buffered while the rest is written as it is produced.
+
+    Args:
+        headers: Header row, written bold on a grey background
+        rows: Iterable of data rows, consumed lazily
+        filename: Download filename
+        sheet_title: Worksheet title (cut to Excel's 31 characters)
+
+    Returns:
+        Response: XLSX file response
+
+    Raises:
+        ImportError: If openpyxl is not installed
+    """
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font, PatternFill
+    from openpyxl.utils import get_column_letter
+
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet(title=sheet_title[:31])
+
+    # Deleted automatically once the response has been sent and closed
+    output = tempfile.TemporaryFile()
+    try:
+        rows = iter(rows)
+        sample = list(islice(rows, XLSX_WIDTH_SAMPLE_ROWS))
+
+        widths = [len(str(header)) for header in headers]
+        for row in sample:
+            for index, value in enumerate(row):
+                if value is not None:
+                    widths[index] = max(widths[index], len(str(value)))
+        for index, width in enumerate(widths, 1):
+            worksheet.column_dimensions[get_column_letter(index)].width = min(width + 2, XLSX_MAX_COLUMN_WIDTH)
+
+        font = Font(bold=True)
+        fill = PatternFill(start_color="CCCCCC", end_color="CCCCCC", fill_type="solid")
+        header_cells = []
+        for header in headers:
+            cell = WriteOnlyCell(worksheet, value=header)
+            cell.font = font
+            cell.fill = fill
+            header_cells.append(cell)
+        worksheet.append(header_cells)
+
+        for row in sample:
+            worksheet.append(row)
+        for row in rows:
+            worksheet.append(row)
+
+        workbook.save(output)
+        output.seek(0)
+    except BaseException:
+        # The response is never sent, so nothing else would remove the files
+        output.close()
+        _discard_sheet_files(workbook)
+        raise
+
+    return send_file(output, mimetype=XLSX_MIMETYPE, as_attachment=True, download_name=filename)
+
+
+def _discard_sheet_files(workbook):
+    """Remove the temporary files openpyxl keeps for unsaved write-only sheets"""
+    for worksheet in workbook.worksheets:
+        writer = getattr(worksheet, '_writer', None)
+        if writer is None or not isinstance(writer.out, str):
+            continue
+        try:
+            if worksheet._rows is not None:
+                worksheet._rows.close()
+            writer.close()
+        except Exception:
+            pass
+        if os.path.exists(writer.out):
+            writer.cleanup()
@@ -1,7 +1,10 @@
+import hashlib
 import os
+import shutil
 import uuid
 from datetime import datetime
 from werkzeug.utils import secure_filename
+from werkzeug.security import safe_join
 from flask import current_app
 
 
@@ -29,6 +32,27 @@ class FileHandler:
         'twibbon': 3 * 1024 * 1024     # 3MB
     }
     
+    # Resized copies of uploaded images: (max width, max height, JPEG quality)
+    IMAGE_VARIANTS = {
+        'thumb': (240, 240, 70),
+        'medium': (1280, 1280, 80)
+    }
+    
+    # Folder inside the upload folder holding generated variants
+    VARIANTS_FOLDER = '_variants'
+    
+    # Folder inside the upload folder keeping uploads replaced by normalization
+    ORIGINALS_FOLDER = '_originals'
+    
+    # Image formats re-encoded by normalize_image, by extension
+    NORMALIZE_FORMATS = {'jpg': 'JPEG', 'jpeg': 'JPEG', 'png': 'PNG'}
+    
+    # Browser cache lifetime of generated variants (1 year)
+    VARIANT_MAX_AGE = 365 * 24 * 60 * 60
+    
+    # Block size used when streaming uploads to disk
+    STREAM_CHUNK_SIZE = 64 * 1024
+    
     @staticmethod
     def allowed_file(filename, file_type='image'):
         """Check if file has allowed extension for given type"""
@@ -120,6 +144,37 @@ class FileHandler:
             current_app.logger.error(f'Error saving file: {str(e)}')
             return False, 'Gagal menyimpan file. Silakan coba lagi.'
     
+    @staticmethod
+    def save_with_digest(file, file_path):
+        """
+        Stream uploaded file to disk in chunks while computing its SHA-256
+        
+        Args:
+            file: FileStorage object from form
+            file_path: Destination path
+        
+        Returns:
+            str: Hex SHA-256 digest of the saved content
+        """
+        digest = hashlib.sha256()
+        file.stream.seek(0)
+        
+        with open(file_path, 'wb') as destination:
+            for chunk in iter(lambda: file.stream.read(FileHandler.STREAM_CHUNK_SIZE), b''):
+                digest.update(chunk)
+                destination.write(chunk)
+        
+        return digest.hexdigest()
+    
+    @staticmethod
+    def file_digest(file_path):
+        """Get hex SHA-256 digest of a file on disk"""
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as source:
+            for chunk in iter(lambda: source.read(FileHandler.STREAM_CHUNK_SIZE), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+    
     @staticmethod
     def delete_file(filename, subfolder):
         """
@@ -139,6 +194,12 @@ class FileHandler:
             upload_folder = current_app.config['UPLOAD_FOLDER']
             file_path = os.path.join(upload_folder, subfolder, filename)
             
+            FileHandler.delete_image_variants(filename, subfolder)
+            
+            original_path = FileHandler.get_original_path(filename, subfolder)
+            if original_path and os.path.exists(original_path):
+                os.remove(original_path)
+            
             if os.path.exists(file_path):
                 os.remove(file_path)
                 return True
@@ -166,6 +227,164 @@ class FileHandler:
         
         return f'/uploads/{subfolder}/{filename}'
     
+    @staticmethod
+    def is_image(filename):
+        """Check if file is an image that can be resized"""
+        return FileHandler.get_file_extension(filename) in FileHandler.ALLOWED_EXTENSIONS['image']
+    
+    @staticmethod
+    def get_variant_path(filename, subfolder, variant):
+        """Get path where the resized variant of an uploaded image is stored"""
+        upload_folder = current_app.config['UPLOAD_FOLDER']
+        stem = filename.rsplit('.', 1)[0]
+        return safe_join(upload_folder, FileHandler.VARIANTS_FOLDER, variant, subfolder, f'{stem}.jpg')
+    
+    @staticmethod
+    def get_image_variant(filename, subfolder, variant):
+        """
+        Get resized JPEG copy of an uploaded image, creating it on first use
+        
+        Args:
+            filename: Name of the original file
+            subfolder: Subfolder name within uploads directory
+            variant: Key of IMAGE_VARIANTS ('thumb' or 'medium')
+        
+        Returns:
+            str: Path to the variant, or None if it cannot be produced
+                 (not an image, unknown variant, missing file or Pillow not installed)
+        """
+        if variant not in FileHandler.IMAGE_VARIANTS or not FileHandler.is_image(filename):
+            return None
+        
+        upload_folder = current_app.config['UPLOAD_FOLDER']
+        source_path = safe_join(upload_folder, subfolder, filename)
+        variant_path = FileHandler.get_variant_path(filename, subfolder, variant)
+        if not source_path or not variant_path or not os.path.exists(source_path):
+            return None
+        
+        if os.path.exists(variant_path):
+            return variant_path
+        
+        try:
+            from PIL import Image, ImageOps
+        except ImportError:
+            return None
+        
+        max_width, max_height, quality = FileHandler.IMAGE_VARIANTS[variant]
+        
+        # Write to a temporary name first so concurrent requests never see partial files
+        temp_path = f'{variant_path}.{uuid.uuid4().hex[:8]}.tmp'
+        
+        try:
+            os.makedirs(os.path.dirname(variant_path), exist_ok=True)
+            
+            with Image.open(source_path) as image:
+                # Phone photos are often stored sideways with an EXIF rotation flag
+                image = ImageOps.exif_transpose(image)
+                image = image.convert('RGB')
+                image.thumbnail((max_width, max_height))
+                image.save(temp_path, 'JPEG', quality=quality, optimize=True, progressive=True)
+            
+            os.replace(temp_path, variant_path)
+            return variant_path
+            
+        except Exception as e:
+            current_app.logger.error(f'Error creating {variant} variant of {filename}: {str(e)}')
+            return None
+        
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+    
+    @staticmethod
+    def delete_image_variants(filename, subfolder):
+        """Delete all generated variants of an uploaded image"""
+        if not filename or not FileHandler.is_image(filename):
+            return
+        
+        for variant in FileHandler.IMAGE_VARIANTS:
+            variant_path = FileHandler.get_variant_path(filename, subfolder, variant)
+            if variant_path and os.path.exists(variant_path):
+                os.remove(variant_path)
+    
+    @staticmethod
+    def get_original_path(filename, subfolder):
+        """Get path where the upload replaced by normalization is kept"""
+        upload_folder = current_app.config['UPLOAD_FOLDER']
+        return safe_join(upload_folder, FileHandler.ORIGINALS_FOLDER, subfolder, filename)
+    
+    @staticmethod
+    def normalize_image(filename, subfolder, max_dimension, quality, keep_original=False, is_current=None):
+        """
+        Re-encode an uploaded JPEG/PNG in place with bounded resolution and quality
+        
+        The re-encoded file keeps its name and format and only replaces the
+        upload when it is smaller. Right before replacing, the upload must
+        still exist and is_current() (when given) must still be true;
+        otherwise the result is discarded, so a file deleted meanwhile is
+        not recreated.
+        
+        Args:
+            filename: Name of the uploaded file
+            subfolder: Subfolder name within uploads directory
+            max_dimension: Maximum width and height in pixels
+            quality: JPEG quality (PNG is saved losslessly with optimization)
+            keep_original: Copy the upload to ORIGINALS_FOLDER before replacing it
+            is_current: Callable telling whether the file is still in use
+        
+        Returns:
+            tuple: (bytes before, bytes after), or None if the file cannot be
+                   normalized (other format, missing or replaced file or
+                   Pillow not installed)
+        """
+        image_format = FileHandler.NORMALIZE_FORMATS.get(FileHandler.get_file_extension(filename))
+        upload_folder = current_app.config['UPLOAD_FOLDER']
+        file_path = safe_join(upload_folder, subfolder, filename) if image_format else None
+        if not file_path or not os.path.exists(file_path):
+            return None
+        
+        try:
+            from PIL import Image, ImageOps
+        except ImportError:
+            return None
+        
+        before = os.path.getsize(file_path)
+        temp_path = f'{file_path}.{uuid.uuid4().hex[:8]}.tmp'
+        
+        try:
+            with Image.open(file_path) as image:
+                image = ImageOps.exif_transpose(image)
+                image.thumbnail((max_dimension, max_dimension))
+                
+                if image_format == 'JPEG':
+                    image.convert('RGB').save(temp_path, 'JPEG', quality=quality, optimize=True, progressive=True)
+                else:
+                    image.save(temp_path, 'PNG', optimize=True)
+            
+            after = os.path.getsize(temp_path)
+            if after >= before:
+                os.remove(temp_path)
+                return before, before
+            
+            if not os.path.exists(file_path) or (is_current and not is_current()):
+                os.remove(temp_path)
+                return None
+            
+            if keep_original:
+                original_path = FileHandler.get_original_path(filename, subfolder)
+                os.makedirs(os.path.dirname(original_path), exist_ok=True)
+                shutil.copy2(file_path, original_path)
+            
+            # Atomic swap so the file is never served half-written
+            os.replace(temp_path, file_path)
+            return before, after
+            
+        except Exception as e:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            current_app.logger.error(f'Error normalizing {filename}: {str(e)}')
+            return None
+    
     @staticmethod
     def file_exists(filename, subfolder):
         """
@@ -444,7 +663,7 @@ def save_payment_proof(file, user_id, competition_id, payment_id):
         payment_id: ID of the payment
     
     Returns:
-        str: Saved filename
+        tuple: (saved filename, hex SHA-256 digest of the file content)
     
     Raises:
         Exception: If file cannot be saved or is invalid
@@ -472,7 +691,10 @@ def save_payment_proof(file, user_id, competition_id, payment_id):
     # Generate descriptive prefix
     prefix = f'payment_proof_{user_id}_{competition_id}_{payment_id}'
     
-    # Save to payment proofs folder
-    filename = save_uploaded_file(file, 'payment_proofs', prefix)
+    # Save to payment proofs folder, hashing while writing
+    filename = FileHandler.generate_unique_filename(file.filename, prefix)
+    folder_path = get_upload_path('payment_proofs')
+    os.makedirs(folder_path, exist_ok=True)
+    digest = FileHandler.save_with_digest(file, os.path.join(folder_path, filename))
     
-    return filename
\ No newline at end of file
+    return filename, digest
\ No newline at end of file
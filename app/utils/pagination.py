@@ -0,0 +1,196 @@
+import base64
+import json
+from datetime import datetime, timedelta
+from app import db
+
+# How far change polling looks back before the server-side watermark
+SYNC_OVERLAP = timedelta(seconds=30)
+
+
+class KeysetPage:
+    """One page of a keyset (cursor) paginated query"""
+
+    def __init__(self, items, per_page, next_cursor=None, cursor=None):
+        self.items = items
+        self.per_page = per_page
+        self.next_cursor = next_cursor
+        self.cursor = cursor
+
+    @property
+    def has_next(self):
+        """Check if there are more rows after this page"""
+        return self.next_cursor is not None
+
+    @property
+    def is_first(self):
+        """Check if this page starts at the beginning of the result set"""
+        return self.cursor is None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def encode_cursor(values):
+    """Encode sort key values of the last row into an opaque URL-safe cursor"""
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, order_by):
+    """
+    Decode cursor produced by encode_cursor()
+
+    Args:
+        cursor: Opaque cursor string from the request
+        order_by: List of (column, direction) tuples the cursor was built for
+
+    Returns:
+        list: Sort key values, or None if cursor is missing or invalid
+    """
+    if not cursor:
+        return None
+
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        if not isinstance(values, list) or len(values) != len(order_by):
+            return None
+
+        decoded = []
+        for value, (column, _) in zip(values, order_by):
+            if value is not None and column.type.python_type is datetime:
+                value = datetime.fromisoformat(value)
+            decoded.append(value)
+        return decoded
+    except (ValueError, TypeError, NotImplementedError):
+        return None
+
+
+def _is_nullable(column):
+    """Check whether a sort column may hold NULL"""
+    return getattr(getattr(column, 'expression', column), 'nullable', False)
+
+
+def _order_clause(column, direction):
+    """Get ORDER BY clause for a sort column; NULLs of nullable columns sort last"""
+    clause = column.asc() if direction == 'asc' else column.desc()
+    return clause.nulls_last() if _is_nullable(column) else clause
+
+
+def _after_clause(order_by, values):
+    """Build WHERE clause selecting rows that sort strictly after given key values"""
+    # Bind values explicitly so booleans compare with < and > like any other type
+    bound = [db.literal(value, column.type) for (column, _), value in zip(order_by, values)]
+
+    clauses = []
+    for i, (column, direction) in enumerate(order_by):
+        # NULLs sort last, so no other value comes after a NULL in this column
+        if values[i] is None:
+            continue
+
+        equal_prefix = [prev_column.is_(None) if prev_value is None else prev_column == prev_bound
+                        for (prev_column, _), prev_value, prev_bound
+                        in zip(order_by[:i], values[:i], bound[:i])]
+        comparison = column > bound[i] if direction == 'asc' else column < bound[i]
+        if _is_nullable(column):
+            comparison = db.or_(comparison, column.is_(None))
+        clauses.append(db.and_(*equal_prefix, comparison))
+    return db.or_(*clauses)
+
+
+def keyset_paginate(query, order_by, key, cursor=None, per_page=20):
+    """
+    Paginate query using keyset (seek) pagination
+
+    Unlike OFFSET pagination, every page costs the same regardless of how deep
+    the admin has scrolled, as long as an index covers the sort columns.
+
+    Args:
+        query: SQLAlchemy query to paginate
+        order_by: List of (column, 'asc' | 'desc') tuples; last one must be unique.
+            NULLs in nullable columns sort after all other values
+        key: Callable returning sort key values (same order as order_by) for a row
+        cursor: Cursor from the previous page's next_cursor
+        per_page: Number of rows per page
+
+    Returns:
+        KeysetPage: Rows of the requested page and cursor for the next one
+    """
+    values = decode_cursor(cursor, order_by)
+    if values is not None:
+        query = query.filter(_after_clause(order_by, values))
+    else:
+        cursor = None
+
+    query = query.order_by(*[_order_clause(column, direction) for column, direction in order_by])
+
+    # Fetch one extra row to know whether a next page exists
+    rows = query.limit(per_page + 1).all()
+    items = rows[:per_page]
+
+    next_cursor = None
+    if len(rows) > per_page:
+        next_cursor = encode_cursor(key(items[-1]))
+
+    return KeysetPage(items, per_page, next_cursor=next_cursor, cursor=cursor)
+
+
+def get_per_page(requested, default, maximum):
+    """Clamp requested page size into [1, maximum], falling back to default"""
+    if not requested or requested < 1:
+        return default
+    return min(requested, maximum)
+
+
+def sync_watermark(taken_at=None):
+    """
+    Get a change-polling watermark for changes_since()
+
+    The watermark is server time (taken before the caller's query) minus
+    SYNC_OVERLAP. updated_at is set by the application clock at flush time,
+    so a row committed late can carry a timestamp slightly before rows that
+    were already returned; the overlap makes the next poll look back far
+    enough to pick it up. Rows in the overlap are returned again, clients
+    deduplicate them by id and updated_at.
+
+    Args:
+        taken_at: Server time the watermark is taken at (defaults to now)
+
+    Returns:
+        str: Cursor over (updated_at, id)
+    """
+    taken_at = taken_at or datetime.utcnow()
+    return encode_cursor([taken_at - SYNC_OVERLAP, 0])
+
+
+def changes_since(query, order_by, key, watermark=None, limit=100):
+    """
+    Get rows changed after a watermark, oldest change first
+
+    The watermark is a keyset cursor over (updated_at, id). While more
+    changes are waiting it points at the last returned row, so large change
+    sets are paged through; once caught up it is the server-side
+    sync_watermark() taken before the query.
+
+    Args:
+        query: SQLAlchemy query selecting the rows to sync
+        order_by: List of (column, 'asc') tuples, e.g. (updated_at, id)
+        key: Callable returning the order_by values of a row
+        watermark: Watermark returned by the previous call or sync_watermark()
+        limit: Maximum number of rows per call
+
+    Returns:
+        tuple: (rows, new watermark, True if more changes are waiting)
+    """
+    taken_at = datetime.utcnow()
+    query = query.filter(order_by[0][0].isnot(None))
+    page = keyset_paginate(query, order_by, key, cursor=watermark, per_page=limit)
+    if page.has_next:
+        watermark = page.next_cursor
+    else:
+        watermark = sync_watermark(taken_at)
+    return page.items, watermark, page.has_next
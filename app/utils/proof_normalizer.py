@@ -0,0 +1,99 @@
+import queue
+import threading
+from flask import current_app
+from app import db
+
+EXTENSION_KEY = 'proof_normalizer'
+SUBFOLDER = 'payment_proofs'
+
+_start_lock = threading.Lock()
+
+
+def normalize_payment_proof(payment_id, filename):
+    """
+    Normalize one payment proof file and record its size before and after
+
+    Must be called inside an application context. The file is left alone
+    and nothing is recorded when the payment got another proof in the meantime.
+
+    Returns:
+        tuple: (bytes before, bytes after), or None if the file was not normalized
+    """
+    from app.models.payment import Payment
+    from app.utils.file_handler import FileHandler
+
+    def is_current():
+        return db.session.scalar(
+            db.select(Payment.id).where(Payment.id == payment_id, Payment.bukti_pembayaran == filename)
+        ) is not None
+    
+    sizes = FileHandler.normalize_image(
+        filename, SUBFOLDER,
+        current_app.config.get('PROOF_MAX_DIMENSION'),
+        current_app.config.get('PROOF_JPEG_QUALITY'),
+        current_app.config.get('PROOF_KEEP_ORIGINAL'),
+        is_current
+    )
+    if sizes is None:
+        return None
+
+    before, after = sizes
+    # Recording sizes is bookkeeping, keep updated_at so delta sync ignores it
+    db.session.execute(
+        db.update(Payment)
+        .where(Payment.id == payment_id, Payment.bukti_pembayaran == filename)
+        .values(bukti_original_bytes=before, bukti_normalized_bytes=after, updated_at=Payment.updated_at)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+
+    current_app.logger.info('Normalized payment proof %s: %d -> %d bytes', filename, before, after)
+
+    return sizes
+
+
+def enqueue_proof_normalization(payment_id, filename):
+    """
+    Queue a freshly uploaded payment proof for normalization off the request thread
+
+    Call after the upload is committed. Does nothing unless PROOF_NORMALIZE is
+    enabled and the proof is a JPEG or PNG.
+
+    Returns:
+        bool: True if the proof was queued
+    """
+    from app.utils.file_handler import FileHandler
+
+    app = current_app._get_current_object()
+    if not app.config.get('PROOF_NORMALIZE') or \
+            FileHandler.get_file_extension(filename) not in FileHandler.NORMALIZE_FORMATS:
+        return False
+
+    _get_queue(app).put((payment_id, filename))
+    return True
+
+
+def _get_queue(app):
+    """Get the app's normalization queue, starting its worker thread on first use"""
+    with _start_lock:
+        jobs = app.extensions.get(EXTENSION_KEY)
+        if jobs is None:
+            jobs = queue.Queue()
+            threading.Thread(
+                target=_run, args=(app, jobs), name='payment-proof-normalizer', daemon=True
+            ).start()
+            app.extensions[EXTENSION_KEY] = jobs
+    return jobs
+
+
+def _run(app, jobs):
+    """Normalize queued proofs one at a time"""
+    while True:
+        payment_id, filename = jobs.get()
+        with app.app_context():
+            try:
+                normalize_payment_proof(payment_id, filename)
+            except Exception:
+                db.session.rollback()
+                app.logger.exception('Payment proof normalization failed for payment %s', payment_id)
+        jobs.task_done()
@@ -0,0 +1,219 @@
+import csv
+import io
+import re
+from collections import namedtuple
+from datetime import datetime, timedelta
+from app import db
+
+# One credit line of a bank mutation statement
+BankLine = namedtuple('BankLine', 'line_number tanggal jumlah keterangan')
+
+# Recognised header names (lowercase) for each column of a bank mutation CSV
+DATE_HEADERS = ('tanggal', 'tgl', 'tanggal transaksi', 'date', 'transaction date', 'waktu')
+AMOUNT_HEADERS = ('kredit', 'credit', 'cr', 'jumlah', 'nominal', 'amount', 'mutasi')
+DESCRIPTION_HEADERS = ('keterangan', 'deskripsi', 'description', 'berita', 'remark', 'uraian')
+TYPE_HEADERS = ('tipe', 'type', 'jenis', 'db/cr', 'cr/db')
+
+# Type column values and amount suffixes marking a debit line
+DEBIT_MARKERS = {'DB', 'D', 'DR', 'DEBIT', 'DEBET'}
+
+DATE_FORMATS = (
+    '%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M', '%Y-%m-%d',
+    '%d/%m/%Y %H:%M:%S', '%d/%m/%Y %H:%M', '%d/%m/%Y',
+    '%d-%m-%Y %H:%M:%S', '%d-%m-%Y %H:%M', '%d-%m-%Y',
+)
+
+MATCHED = 'matched'
+AMBIGUOUS = 'ambiguous'
+UNMATCHED = 'unmatched'
+
+
+def _find_column(fieldnames, candidates):
+    """Get the first header matching one of the candidate names"""
+    normalized = {name.strip().lower(): name for name in fieldnames if name}
+    for candidate in candidates:
+        if candidate in normalized:
+            return normalized[candidate]
+    return None
+
+
+def parse_amount(value):
+    """
+    Parse a bank amount into whole rupiah and its debit/credit direction
+
+    Accepts '50000', '50.000', '50.000,00', '50,000.00' and 'Rp 50.000'.
+    A minus sign, parentheses or a DB/D/DR/DEBIT marker ('-50000',
+    '(50.000)', '50,000.00 DB') mark a debit; CR/K markers and plain
+    amounts are credits.
+
+    Returns:
+        tuple: (amount, is_debit), amount is None if the value is not a number
+    """
+    value = (value or '').strip()
+    markers = set(re.findall(r'[A-Z]+', value.upper()))
+    is_debit = '-' in value or (value.startswith('(') and value.endswith(')')) or \
+        bool(markers & DEBIT_MARKERS)
+
+    text = re.sub(r'[^\d,.]', '', value)
+    if not text:
+        return None, is_debit
+
+    # A trailing group of 1-2 digits after the last separator is the fraction
+    match = re.match(r'^(.*?)[,.](\d{1,2})$', text)
+    if match:
+        text = match.group(1)
+
+    digits = re.sub(r'[,.]', '', text)
+    return (int(digits) if digits else None), is_debit
+
+
+def parse_date(value):
+    """Parse a bank transaction date, returning None if no known format matches"""
+    value = (value or '').strip()
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format)
+        except ValueError:
+            continue
+    return None
+
+
+def parse_bank_csv(stream):
+    """
+    Read credit lines from a bank mutation CSV
+
+    The delimiter (comma or semicolon) and the date, amount and description
+    columns are detected from the header row. Lines marked as debit, in the
+    type column or on the amount itself, are skipped.
+
+    Args:
+        stream: Binary file-like object with the CSV content
+
+    Returns:
+        tuple: (list of BankLine, list of error messages)
+    """
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', errors='replace', newline='')
+    sample = text.read(4096)
+    text.seek(0)
+
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=',;\t')
+    except csv.Error:
+        dialect = csv.excel
+
+    reader = csv.DictReader(text, dialect=dialect)
+    fieldnames = reader.fieldnames or []
+    date_column = _find_column(fieldnames, DATE_HEADERS)
+    amount_column = _find_column(fieldnames, AMOUNT_HEADERS)
+    description_column = _find_column(fieldnames, DESCRIPTION_HEADERS)
+    type_column = _find_column(fieldnames, TYPE_HEADERS)
+
+    if not date_column or not amount_column:
+        return [], ['Kolom tanggal dan jumlah/kredit tidak ditemukan pada header CSV']
+
+    lines = []
+    errors = []
+    for line_number, row in enumerate(reader, 2):
+        if type_column and (row.get(type_column) or '').strip().upper() in DEBIT_MARKERS:
+            continue
+
+        tanggal = parse_date(row.get(date_column))
+        jumlah, is_debit = parse_amount(row.get(amount_column))
+        if not jumlah or is_debit:
+            continue  # Debit line, or empty credit column
+        if tanggal is None:
+            errors.append(f'Baris {line_number}: format tanggal tidak dikenali')
+            continue
+
+        keterangan = (row.get(description_column) or '').strip() if description_column else ''
+        lines.append(BankLine(line_number, tanggal, jumlah, keterangan))
+
+    return lines, errors
+
+
+def _pending_payments_by_amount(amounts):
+    """
+    Index pending payments with the given amounts by jumlah
+
+    Only the columns needed for matching are loaded, in one query per
+    chunk of BULK_CHUNK_SIZE amounts.
+
+    Returns:
+        dict: jumlah -> list of (payment_id, reference time, has unique code)
+    """
+    from app.models.payment import Payment
+    from app.models.registration import Registration
+
+    index = {}
+    amounts = sorted(amounts)
+
+    for start in range(0, len(amounts), Payment.BULK_CHUNK_SIZE):
+        chunk = amounts[start:start + Payment.BULK_CHUNK_SIZE]
+        rows = db.session.execute(
+            db.select(
+                Payment.id, Payment.jumlah,
+                db.func.coalesce(Payment.tanggal_upload, Registration.tanggal_registrasi),
+                Payment.kode_unik
+            )
+            .join(Registration, Payment.registration_id == Registration.id)
+            .where(Payment.status == 'pending', Payment.jumlah.in_(chunk))
+            .order_by(Payment.id)
+        )
+        for payment_id, jumlah, reference, kode_unik in rows:
+            if reference is not None:
+                index.setdefault(jumlah, []).append((payment_id, reference, kode_unik is not None))
+    return index
+
+
+def match_bank_lines(lines, window_hours):
+    """
+    Match bank credit lines to pending payments by amount and time window
+
+    A line matches a payment with the same jumlah whose proof upload time
+    (or registration time when no proof was uploaded) lies within
+    window_hours of the transfer. Every payment is proposed for one line
+    at most; lines with several candidates are proposed with the nearest
+    one but flagged as ambiguous. Amounts carrying a unique payment code
+    identify their payment directly, regardless of the time window.
+
+    Args:
+        lines: List of BankLine
+        window_hours: Maximum distance between transfer and payment times
+
+    Returns:
+        list: One dict per line with keys line, status, payment_id and candidates
+    """
+    index = _pending_payments_by_amount({line.jumlah for line in lines})
+    window = timedelta(hours=window_hours)
+    taken = set()
+    results = []
+
+    for line in sorted(lines, key=lambda line: line.tanggal):
+        available = [entry for entry in index.get(line.jumlah, ()) if entry[0] not in taken]
+        coded = [payment_id for payment_id, _, has_code in available if has_code]
+        if len(coded) == 1:
+            taken.add(coded[0])
+            results.append({'line': line, 'status': MATCHED, 'payment_id': coded[0], 'candidates': coded})
+            continue
+
+        candidates = sorted(
+            (abs(reference - line.tanggal), payment_id)
+            for payment_id, reference, _ in available
+            if abs(reference - line.tanggal) <= window
+        )
+
+        if not candidates:
+            results.append({'line': line, 'status': UNMATCHED, 'payment_id': None, 'candidates': []})
+            continue
+
+        payment_id = candidates[0][1]
+        taken.add(payment_id)
+        results.append({
+            'line': line,
+            'status': MATCHED if len(candidates) == 1 else AMBIGUOUS,
+            'payment_id': payment_id,
+            'candidates': [candidate_id for _, candidate_id in candidates]
+        })
+
+    results.sort(key=lambda result: result['line'].line_number)
+    return results
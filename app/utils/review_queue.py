@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta
+from app import db
+
+
+def _claim_values(model, **values):
+    """Build UPDATE values that leave the model's updated_at timestamp alone"""
+    # Claiming is bookkeeping, not a change of the reviewed data
+    if hasattr(model, 'updated_at'):
+        values['updated_at'] = model.updated_at
+    return values
+
+
+def claim_batch(model, admin_id, eligible, order_by, size, lease_minutes):
+    """
+    Claim a batch of review items for one admin with a time-limited lease
+
+    Claims are taken with a single conditional UPDATE that only touches rows
+    nobody else holds, so concurrent admins never receive the same item and
+    no row locks are held between requests. Items the admin already holds get
+    their lease renewed and count towards the batch size.
+
+    Args:
+        model: Model with claimed_by and claim_expires_at columns
+        admin_id: ID of the admin claiming the batch
+        eligible: WHERE clause selecting items that still need review
+        order_by: Columns deciding which items are claimed first
+        size: Maximum number of items held after claiming
+        lease_minutes: Lease duration in minutes
+
+    Returns:
+        tuple: (number of items held by the admin, lease expiry datetime)
+    """
+    now = datetime.utcnow()
+    expires = now + timedelta(minutes=lease_minutes)
+
+    held_by_admin = db.and_(model.claimed_by == admin_id, model.claim_expires_at > now)
+    free = db.or_(model.claimed_by.is_(None), model.claim_expires_at <= now)
+
+    # Renew the lease on items the admin still holds
+    held = db.session.execute(
+        db.update(model)
+        .where(held_by_admin, eligible)
+        .values(**_claim_values(model, claim_expires_at=expires))
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+    claimed = 0
+    if held < size:
+        candidates = db.select(model.id).where(eligible, free).order_by(*order_by).limit(size - held)
+        # Re-check the claim condition so rows taken concurrently are skipped
+        claimed = db.session.execute(
+            db.update(model)
+            .where(model.id.in_(candidates), free)
+            .values(**_claim_values(model, claimed_by=admin_id, claim_expires_at=expires))
+            .execution_options(synchronize_session=False)
+        ).rowcount
+
+    db.session.commit()
+
+    return held + claimed, expires
+
+
+def claimed_by_filter(model, admin_id):
+    """Get WHERE clause selecting items currently leased to an admin"""
+    return db.and_(model.claimed_by == admin_id, model.claim_expires_at > datetime.utcnow())
+
+
+def release_claims(model, admin_id):
+    """
+    Release every item leased to an admin
+
+    Returns:
+        int: Number of released items
+    """
+    released = db.session.execute(
+        db.update(model)
+        .where(model.claimed_by == admin_id)
+        .values(**_claim_values(model, claimed_by=None, claim_expires_at=None))
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.session.commit()
+    return released
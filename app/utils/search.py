@@ -0,0 +1,190 @@
+import re
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app import db
+
+# FTS5 virtual table holding one row per user (rowid = users.id)
+SEARCH_TABLE = 'user_search'
+EXTENSION_KEY = 'user_search_fts'
+
+_TOKEN_PATTERN = re.compile(r'\w+', re.UNICODE)
+
+
+def _fts5_available(connection):
+    """Check if the SQLite library was compiled with FTS5"""
+    options = connection.exec_driver_sql('PRAGMA compile_options').scalars().all()
+    return 'ENABLE_FTS5' in options
+
+
+def is_fts_enabled():
+    """Check if the full-text search index is active for the current app"""
+    return has_app_context() and current_app.extensions.get(EXTENSION_KEY, False)
+
+
+def init_search_index(app):
+    """
+    Create the FTS5 search table on SQLite and populate it if it is new
+
+    Must be called inside an application context after db.create_all().
+    Other database engines fall back to LIKE queries.
+    """
+    app.extensions[EXTENSION_KEY] = False
+
+    if db.engine.dialect.name != 'sqlite':
+        return
+
+    with db.engine.begin() as connection:
+        if not _fts5_available(connection):
+            app.logger.warning('SQLite was built without FTS5, user search falls back to LIKE')
+            return
+
+        exists = connection.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (SEARCH_TABLE,)
+        ).first()
+
+        if not exists:
+            connection.exec_driver_sql(
+                f"CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5("
+                f"email, nama_lengkap, sekolah, tokenize = 'unicode61 remove_diacritics 2')"
+            )
+            _reindex(connection)
+
+    app.extensions[EXTENSION_KEY] = True
+
+    if not event.contains(Session, 'after_flush', _sync_search_index):
+        event.listen(Session, 'after_flush', _sync_search_index)
+
+
+def rebuild_search_index():
+    """Rebuild the whole search index from users and user_profiles"""
+    if not is_fts_enabled():
+        return
+    _reindex(db.session.connection())
+    db.session.commit()
+
+
+def _reindex(connection, user_ids=None):
+    """Replace index rows of given users (all users if None) with current data"""
+    if user_ids is None:
+        connection.exec_driver_sql(f"DELETE FROM {SEARCH_TABLE}")
+        where, params = '', {}
+    else:
+        placeholders = ', '.join(f':id{i}' for i in range(len(user_ids)))
+        params = {f'id{i}': user_id for i, user_id in enumerate(user_ids)}
+        connection.execute(
+            db.text(f"DELETE FROM {SEARCH_TABLE} WHERE rowid IN ({placeholders})"), params
+        )
+        where = f"WHERE users.id IN ({placeholders})"
+
+    connection.execute(db.text(
+        f"INSERT INTO {SEARCH_TABLE} (rowid, email, nama_lengkap, sekolah) "
+        f"SELECT users.id, users.email, user_profiles.nama_lengkap, user_profiles.sekolah "
+        f"FROM users LEFT JOIN user_profiles ON user_profiles.user_id = users.id {where}"
+    ), params)
+
+
+def _sync_search_index(session, flush_context):
+    """Refresh index rows of users whose searchable fields were flushed"""
+    from app.models.user import User, UserProfile
+
+    if not is_fts_enabled():
+        return
+
+    user_ids = set()
+    for obj in session.new | session.dirty | session.deleted:
+        if isinstance(obj, User):
+            attributes, user_id = ('email',), obj.id
+        elif isinstance(obj, UserProfile):
+            attributes, user_id = ('nama_lengkap', 'sekolah', 'user_id'), obj.user_id
+        else:
+            continue
+
+        state = db.inspect(obj)
+        if obj in session.dirty and not any(state.attrs[name].history.has_changes() for name in attributes):
+            continue
+
+        if user_id is not None:
+            user_ids.add(user_id)
+
+        # Profile moved to another user: refresh the previous owner too
+        if isinstance(obj, UserProfile):
+            user_ids.update(state.attrs.user_id.history.deleted or ())
+
+    if user_ids:
+        _reindex(session.connection(), sorted(user_ids))
+
+
+def build_match_query(text):
+    """
+    Convert free text into an FTS5 MATCH expression
+
+    Every word becomes a quoted prefix term and all terms must match,
+    e.g. "budi smp 1" -> '"budi"* "smp"* "1"*'.
+    """
+    tokens = _TOKEN_PATTERN.findall(text or '')
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def user_search_filter(text):
+    """
+    Get a WHERE clause matching users (joined with their profile) by search text
+
+    Uses the FTS5 index when available and LIKE on email, nama_lengkap and
+    sekolah otherwise. The query must select from users joined with user_profiles.
+    """
+    from app.models.user import User, UserProfile
+
+    match_query = build_match_query(text)
+
+    if is_fts_enabled():
+        if not match_query:
+            return db.false()
+        matches = db.text(
+            f"SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH :match_query"
+        ).bindparams(match_query=match_query).columns(rowid=db.Integer)
+        return User.id.in_(matches)
+
+    return db.or_(
+        User.email.contains(text),
+        UserProfile.nama_lengkap.contains(text),
+        UserProfile.sekolah.contains(text)
+    )
+
+
+def search_user_ids(text, limit=10):
+    """
+    Get IDs of users matching search text, best match first
+
+    Args:
+        text: Free text entered by the user
+        limit: Maximum number of IDs
+
+    Returns:
+        list: Matching user IDs ordered by relevance
+    """
+    from app.models.user import User, UserProfile
+
+    match_query = build_match_query(text)
+    if not match_query:
+        return []
+
+    if is_fts_enabled():
+        rows = db.session.execute(
+            db.text(
+                f"SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH :match_query "
+                f"ORDER BY rank LIMIT :limit"
+            ),
+            {'match_query': match_query, 'limit': limit}
+        )
+        return [row[0] for row in rows]
+
+    pattern = f'%{text}%'
+    rows = db.session.query(User.id).outerjoin(UserProfile).filter(
+        db.or_(
+            User.email.ilike(pattern),
+            UserProfile.nama_lengkap.ilike(pattern),
+            UserProfile.sekolah.ilike(pattern)
+        )
+    ).order_by(User.email).limit(limit)
+    return [row[0] for row in rows]
@@ -0,0 +1,194 @@
+import threading
+import time
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app import db
+
+
+class StatsCache:
+    """Thread-safe in-process cache for admin dashboard statistics"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._generation = 0
+
+    def get(self, key, loader, ttl):
+        """
+        Get cached value for key, computing it with loader on miss or expiry
+
+        Args:
+            key: Cache key
+            loader: Callable computing the value
+            ttl: Lifetime in seconds; guards against writes from other processes
+
+        Returns:
+            Cached or freshly computed value
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > now:
+                return entry[1]
+            generation = self._generation
+
+        value = loader()
+
+        with self._lock:
+            # Don't cache a value computed while an invalidation happened
+            if generation == self._generation:
+                self._entries[key] = (now + ttl, value)
+        return value
+
+    def invalidate(self, *keys):
+        """Drop cached values; drop everything if no key is given"""
+        with self._lock:
+            self._generation += 1
+            if not keys:
+                self._entries.clear()
+            for key in keys:
+                self._entries.pop(key, None)
+
+
+stats_cache = StatsCache()
+
+VERIFICATION_STATS_KEY = 'verification'
+PAYMENT_STATS_KEY = 'payment'
+
+
+def _compute_verification_stats():
+    """Compute verification statistics with a single aggregate query"""
+    from app.models.user import User, UserProfile
+
+    is_complete = UserProfile.verification_progress == 100
+    total, verified, complete, pending = db.session.query(
+        db.func.count(UserProfile.id),
+        db.func.sum(db.case((UserProfile.is_verified == True, 1), else_=0)),
+        db.func.sum(db.case((is_complete, 1), else_=0)),
+        db.func.sum(db.case((db.and_(is_complete, UserProfile.is_verified == False), 1), else_=0))
+    ).select_from(User).join(UserProfile).one()
+
+    total = total or 0
+    verified = verified or 0
+
+    return {
+        'total_users': total,
+        'verified_users': verified,
+        'complete_profiles': complete or 0,
+        'pending_verification': pending or 0,
+        'verification_rate': round((verified / total * 100) if total > 0 else 0, 1)
+    }
+
+
+def get_verification_stats():
+    """Get cached user verification statistics for the admin verifikasi page"""
+    stats = stats_cache.get(
+        VERIFICATION_STATS_KEY,
+        _compute_verification_stats,
+        current_app.config.get('STATS_CACHE_TTL', 60)
+    )
+    return dict(stats)
+
+
+def invalidate_verification_stats():
+    """Drop cached verification statistics"""
+    stats_cache.invalidate(VERIFICATION_STATS_KEY)
+
+
+def _compute_payment_stats():
+    """Compute payment statistics with a single GROUP BY status query"""
+    from app.models.payment import Payment
+
+    rows = db.session.query(
+        Payment.status,
+        db.func.count(Payment.id),
+        db.func.sum(Payment.jumlah)
+    ).group_by(Payment.status).all()
+
+    counts = {status: count for status, count, _ in rows}
+    amounts = {status: amount or 0 for status, _, amount in rows}
+    total = sum(counts.values())
+    approved = counts.get('approved', 0)
+
+    return {
+        'total_payments': total,
+        'pending_payments': counts.get('pending', 0),
+        'approved_payments': approved,
+        'rejected_payments': counts.get('rejected', 0),
+        'total_revenue': amounts.get('approved', 0),
+        'pending_amount': amounts.get('pending', 0),
+        'approval_rate': round((approved / total * 100) if total > 0 else 0, 1)
+    }
+
+
+def get_payment_stats():
+    """Get cached payment statistics for the admin pembayaran and export pages"""
+    stats = stats_cache.get(
+        PAYMENT_STATS_KEY,
+        _compute_payment_stats,
+        current_app.config.get('STATS_CACHE_TTL', 60)
+    )
+    return dict(stats)
+
+
+def invalidate_payment_stats():
+    """Drop cached payment statistics"""
+    stats_cache.invalidate(PAYMENT_STATS_KEY)
+
+
+def _stats_dependencies():
+    """Get (model, attributes, cache key) triples: flushing changes to them makes the key stale"""
+    from app.models.user import UserProfile
+    from app.models.payment import Payment
+
+    return (
+        (UserProfile, ('is_verified', 'verification_progress'), VERIFICATION_STATS_KEY),
+        (Payment, ('status', 'jumlah'), PAYMENT_STATS_KEY),
+    )
+
+
+def _track_stats_changes(session, flush_context):
+    """Remember which statistics are affected by the flushed changes"""
+    stale = set()
+
+    for model, attributes, key in _stats_dependencies():
+        for obj in session.new | session.deleted:
+            if isinstance(obj, model):
+                stale.add(key)
+                break
+        else:
+            for obj in session.dirty:
+                if not isinstance(obj, model):
+                    continue
+                state = db.inspect(obj)
+                if any(state.attrs[name].history.has_changes() for name in attributes):
+                    stale.add(key)
+                    break
+
+    if stale:
+        session.info.setdefault('stale_stats', set()).update(stale)
+
+
+def _invalidate_stale_stats(session):
+    """Invalidate statistics touched by the committed transaction"""
+    stale = session.info.pop('stale_stats', None)
+    if stale:
+        stats_cache.invalidate(*stale)
+
+
+def _discard_stale_stats(session):
+    """Forget tracked changes of a rolled back transaction"""
+    session.info.pop('stale_stats', None)
+
+
+def register_stats_listeners():
+    """Hook statistics cache invalidation into SQLAlchemy session events"""
+    listeners = (
+        ('after_flush', _track_stats_changes),
+        ('after_commit', _invalidate_stale_stats),
+        ('after_rollback', _discard_stale_stats),
+    )
+    for name, listener in listeners:
+        if not event.contains(Session, name, listener):
+            event.listen(Session, name, listener)
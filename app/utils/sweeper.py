@@ -0,0 +1,63 @@
+import threading
+import time
+from flask import current_app
+from app import db
+
+EXTENSION_KEY = 'overdue_sweeper'
+
+
+def sweep_overdue_payments(batch_size=None):
+    """
+    Expire overdue payments once and log counts and timing
+
+    Must be called inside an application context.
+
+    Returns:
+        dict: Number of expired payments, batches and elapsed milliseconds
+    """
+    from app.models.payment import Payment
+
+    started = time.perf_counter()
+    expired, batches = Payment.expire_overdue_payments(
+        batch_size or current_app.config.get('OVERDUE_SWEEP_BATCH_SIZE')
+    )
+    elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+
+    current_app.logger.info(
+        'Overdue payment sweep: expired %d payments in %d batches (%.1f ms)',
+        expired, batches, elapsed_ms
+    )
+
+    return {'expired': expired, 'batches': batches, 'elapsed_ms': elapsed_ms}
+
+
+def start_overdue_sweeper(app):
+    """
+    Start a daemon thread sweeping overdue payments every OVERDUE_SWEEP_INTERVAL seconds
+
+    Does nothing when the interval is 0 or the sweeper already runs for this app.
+    Only started by run.py when it serves the app; WSGI servers with several
+    workers, the CLI and tests do not start it (use `flask expire-payments`).
+
+    Returns:
+        threading.Event: Set it to stop the sweeper, or None if not started
+    """
+    interval = app.config.get('OVERDUE_SWEEP_INTERVAL', 0)
+    if interval <= 0 or EXTENSION_KEY in app.extensions:
+        return None
+
+    stop = threading.Event()
+
+    def run():
+        while not stop.wait(interval):
+            with app.app_context():
+                try:
+                    sweep_overdue_payments()
+                except Exception:
+                    db.session.rollback()
+                    app.logger.exception('Overdue payment sweep failed')
+
+    threading.Thread(target=run, name='overdue-payment-sweeper', daemon=True).start()
+    app.extensions[EXTENSION_KEY] = stop
+
+    return stop
@@ -1,5 +1,5 @@
 from functools import wraps
-from flask import flash, redirect, url_for, request
+from flask import flash, redirect, url_for, request, g, has_request_context
 from flask_login import current_user
 
 
@@ -53,6 +53,22 @@ def verification_required(f):
 class ProfileVerificationHelper:
     """Helper class for profile verification utilities"""
     
+    BADGE_CLASSES = {
+        'not_logged_in': 'bg-secondary',
+        'no_profile': 'bg-danger',
+        'incomplete': 'bg-warning text-dark',
+        'pending_verification': 'bg-info',
+        'verified': 'bg-success'
+    }
+    
+    ICONS = {
+        'not_logged_in': 'fas fa-user-slash',
+        'no_profile': 'fas fa-user-plus',
+        'incomplete': 'fas fa-user-edit',
+        'pending_verification': 'fas fa-clock',
+        'verified': 'fas fa-user-check'
+    }
+    
     @staticmethod
     def can_register_competition(user):
         """
@@ -74,12 +90,61 @@ class ProfileVerificationHelper:
         
         return True, 'Dapat mendaftar kompetisi'
     
+    @staticmethod
+    def _status_cache_key(user):
+        """Get memo key identifying user and the version of their profile"""
+        if not user.is_authenticated:
+            return ('anonymous',)
+        
+        profile = user.profile
+        if not profile:
+            return (user.id, None)
+        
+        return (user.id, profile.id, profile.updated_at, profile.verification_progress, profile.is_verified)
+    
     @staticmethod
     def get_profile_status_info(user):
         """
         Get comprehensive profile status information
         Returns dict with status details
+        
+        The result is memoized for the current request, so templates calling
+        several helpers for the same user compute the status only once.
         """
+        if not has_request_context():
+            return ProfileVerificationHelper._build_status_info(user)
+        
+        cache = g.setdefault('profile_status_cache', {})
+        key = ProfileVerificationHelper._status_cache_key(user)
+        
+        if key not in cache:
+            cache[key] = ProfileVerificationHelper._build_status_info(user)
+        
+        return cache[key]
+    
+    @staticmethod
+    def _build_status_info(user):
+        """Compute status info together with badge, icon and next action message"""
+        status_info = ProfileVerificationHelper._compute_status_info(user)
+        status = status_info['status']
+        
+        messages = {
+            'not_logged_in': 'Silakan login untuk melanjutkan',
+            'no_profile': 'Lengkapi profil Anda untuk dapat mendaftar kompetisi',
+            'incomplete': f'Lengkapi {len(status_info.get("missing_fields", []))} field yang tersisa',
+            'pending_verification': 'Tunggu verifikasi admin (biasanya 1-2 hari kerja)',
+            'verified': 'Anda dapat mendaftar kompetisi'
+        }
+        
+        status_info['badge_class'] = ProfileVerificationHelper.BADGE_CLASSES.get(status, 'bg-secondary')
+        status_info['icon'] = ProfileVerificationHelper.ICONS.get(status, 'fas fa-user')
+        status_info['next_action'] = messages.get(status, 'Status tidak diketahui')
+        
+        return status_info
+    
+    @staticmethod
+    def _compute_status_info(user):
+        """Compute profile status details without memoization"""
         if not user.is_authenticated:
             return {
                 'status': 'not_logged_in',
@@ -125,50 +190,17 @@ class ProfileVerificationHelper:
     @staticmethod
     def get_verification_badge_class(user):
         """Get Bootstrap badge class based on verification status"""
-        status_info = ProfileVerificationHelper.get_profile_status_info(user)
-        status = status_info['status']
-        
-        badge_classes = {
-            'not_logged_in': 'bg-secondary',
-            'no_profile': 'bg-danger',
-            'incomplete': 'bg-warning text-dark',
-            'pending_verification': 'bg-info',
-            'verified': 'bg-success'
-        }
-        
-        return badge_classes.get(status, 'bg-secondary')
+        return ProfileVerificationHelper.get_profile_status_info(user)['badge_class']
     
     @staticmethod
     def get_verification_icon(user):
         """Get Font Awesome icon based on verification status"""
-        status_info = ProfileVerificationHelper.get_profile_status_info(user)
-        status = status_info['status']
-        
-        icons = {
-            'not_logged_in': 'fas fa-user-slash',
-            'no_profile': 'fas fa-user-plus',
-            'incomplete': 'fas fa-user-edit',
-            'pending_verification': 'fas fa-clock',
-            'verified': 'fas fa-user-check'
-        }
-        
-        return icons.get(status, 'fas fa-user')
+        return ProfileVerificationHelper.get_profile_status_info(user)['icon']
     
     @staticmethod
     def get_next_action_message(user):
         """Get message about what user should do next"""
-        status_info = ProfileVerificationHelper.get_profile_status_info(user)
-        status = status_info['status']
-        
-        messages = {
-            'not_logged_in': 'Silakan login untuk melanjutkan',
-            'no_profile': 'Lengkapi profil Anda untuk dapat mendaftar kompetisi',
-            'incomplete': f'Lengkapi {len(status_info.get("missing_fields", []))} field yang tersisa',
-            'pending_verification': 'Tunggu verifikasi admin (biasanya 1-2 hari kerja)',
-            'verified': 'Anda dapat mendaftar kompetisi'
-        }
-        
-        return messages.get(status, 'Status tidak diketahui')
+        return ProfileVerificationHelper.get_profile_status_info(user)['next_action']
 
 
 def check_competition_eligibility(user, competition=None):
@@ -11,9 +11,17 @@ config_name = os.environ.get('FLASK_CONFIG', 'development')
 app = create_app(config[config_name])
 
 if __name__ == '__main__':
+    debug = app.config.get('DEBUG', False)
+
+    # Optional in-process overdue payment sweeper (OVERDUE_SWEEP_INTERVAL),
+    # started in the serving process only, not in the reloader's watcher
+    if not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        from app.utils.sweeper import start_overdue_sweeper
+        start_overdue_sweeper(app)
+
     # Run the application
     app.run(
         host='0.0.0.0',
         port=int(os.environ.get('PORT', 8818)),
-        debug=app.config.get('DEBUG', False)
+        debug=debug
     )
\ No newline at end of file
@@ -0,0 +1,119 @@
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import event
+from app import create_app, db
+from app.config import TestingConfig
+
+# Password of users created to log in
+PASSWORD = 'rahasia123'
+
+
+@pytest.fixture
+def app(tmp_path):
+    """Application on a fresh in-memory database with uploads in a temporary folder"""
+    class Config(TestingConfig):
+        UPLOAD_FOLDER = str(tmp_path)
+        # The test client talks plain HTTP
+        SESSION_COOKIE_SECURE = False
+        REMEMBER_COOKIE_SECURE = False
+
+    app = create_app(Config)
+    yield app
+
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    """Test client"""
+    return app.test_client()
+
+
+@pytest.fixture
+def login(client):
+    """Log a user in through the login form"""
+    def login(email, password=PASSWORD):
+        response = client.post('/masuk', data={'email': email, 'password': password})
+        assert response.status_code == 302, 'login failed'
+        return response
+    return login
+
+
+@pytest.fixture
+def count_queries(app):
+    """
+    Count SQL statements sent to the database
+
+    Usage:
+        with count_queries() as statements:
+            client.get(...)
+        assert len(statements) == ...
+    """
+    with app.app_context():
+        engine = db.engine
+
+    @contextmanager
+    def counter():
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+    return counter
+
+
+def create_user(email, is_admin=False, password=None, **profile):
+    """
+    Create a user, with a profile when profile fields are given; call inside an app context
+
+    Only users created with a password can log in; password hashing is slow,
+    so it is skipped for the rest.
+    """
+    from app.models.user import User, UserProfile
+
+    user = User(email=email, is_admin=is_admin)
+    if password:
+        user.set_password(password)
+    else:
+        user.password_hash = '!'
+    db.session.add(user)
+    db.session.flush()
+
+    if profile:
+        db.session.add(UserProfile(user_id=user.id, **profile))
+        db.session.flush()
+
+    return user
+
+
+def create_competition(**fields):
+    """Create an individual competition open for registration; call inside an app context"""
+    from app.models.competition import Competition
+
+    now = datetime.utcnow()
+    values = {
+        'nama_kompetisi': 'Olimpiade Matematika',
+        'kategori': 'individual',
+        'jenis': 'academic',
+        'harga_early_bird': 50000,
+        'harga_reguler': 75000,
+        'tanggal_mulai_early_bird': now - timedelta(days=5),
+        'tanggal_akhir_early_bird': now + timedelta(days=5),
+        'deadline_registrasi': now + timedelta(days=10),
+        'tanggal_kompetisi': now + timedelta(days=20),
+    }
+    values.update(fields)
+
+    competition = Competition(**values)
+    db.session.add(competition)
+    db.session.flush()
+    return competition
@@ -0,0 +1,65 @@
+from app import db
+from tests.conftest import PASSWORD, create_user, create_competition
+
+
+def add_payments(competition_id, start, count, status='pending'):
+    """Register count participants with payments; returns the payment IDs"""
+    from app.models.registration import Registration
+    from app.models.payment import Payment
+
+    payment_ids = []
+    for number in range(start, start + count):
+        user = create_user(f'peserta{number}@example.com')
+        registration = Registration(user_id=user.id, competition_id=competition_id, harga_terkunci=50000)
+        db.session.add(registration)
+        db.session.flush()
+        payment = Payment(registration_id=registration.id, jumlah=50000 + number, status=status)
+        db.session.add(payment)
+        db.session.flush()
+        payment_ids.append(payment.id)
+    db.session.commit()
+    return payment_ids
+
+
+def test_bulk_approve_updates_ledger_with_constant_query_count(app, client, login, count_queries):
+    from app.models.payment import Payment
+    from app.models.registration import Registration
+    from app.models.ledger import PaymentLedgerEntry, CompetitionRevenue
+
+    with app.app_context():
+        create_user('admin@example.com', is_admin=True, password=PASSWORD)
+        competition_id = create_competition().id
+        first_ids = add_payments(competition_id, 0, 1)
+        small_ids = add_payments(competition_id, 1, 2)
+        large_ids = add_payments(competition_id, 3, 60)
+        processed_ids = add_payments(competition_id, 63, 2, status='rejected')
+
+    login('admin@example.com')
+
+    def approve(payment_ids):
+        with count_queries() as statements:
+            response = client.post('/admin/pembayaran/bulk-action', data={
+                'action': 'approve', 'payment_ids': [str(payment_id) for payment_id in payment_ids]
+            })
+        assert response.status_code == 302
+        return statements
+
+    # The first approval creates the revenue rollup row
+    approve(first_ids)
+    small = approve(small_ids)
+    large = approve(large_ids + processed_ids + [999999])
+    assert len(large) == len(small)
+
+    with app.app_context():
+        approved_ids = first_ids + small_ids + large_ids
+        payments = Payment.query.filter(Payment.id.in_(approved_ids + processed_ids)).all()
+        assert sorted(p.id for p in payments if p.status == 'approved') == sorted(approved_ids)
+        assert all(p.registration.status == 'approved' for p in payments if p.status == 'approved')
+        assert all(p.registration.status != 'approved' for p in payments if p.status == 'rejected')
+
+        entries = PaymentLedgerEntry.query.filter_by(status_to='approved').all()
+        assert sorted(entry.payment_id for entry in entries) == sorted(approved_ids)
+
+        rollup = db.session.get(CompetitionRevenue, competition_id)
+        assert rollup.paid_count == len(approved_ids)
+        assert rollup.revenue == sum(50000 + number for number in range(63))
@@ -0,0 +1,60 @@
+import pytest
+from app import db
+from tests.conftest import PASSWORD, create_user, create_competition
+
+
+def add_participants(competition_id, start, count):
+    """Register count participants with profiles and payments, every three of them in a team"""
+    from app.models.registration import Registration, Team, TeamMember
+    from app.models.payment import Payment
+
+    team = None
+    for number in range(start, start + count):
+        user = create_user(f'peserta{number}@example.com', nama_lengkap=f'Peserta {number}',
+                           sekolah='SMP Negeri 1', kelas=8, whatsapp='08123456789')
+        if number % 3 == 0:
+            team = Team(nama_tim=f'Tim {number}', competition_id=competition_id, captain_id=user.id)
+            db.session.add(team)
+            db.session.flush()
+
+        registration = Registration(user_id=user.id, competition_id=competition_id,
+                                    harga_terkunci=50000, team_id=team.id if team else None)
+        db.session.add(registration)
+        db.session.flush()
+        if team:
+            db.session.add(TeamMember(team_id=team.id, user_id=user.id,
+                                      posisi='Captain' if number % 3 == 0 else 'Player'))
+
+        db.session.add(Payment(registration_id=registration.id, jumlah=50000,
+                               status='approved' if number % 2 else 'pending'))
+    db.session.commit()
+
+
+@pytest.mark.parametrize('export_format', ['csv', 'excel'])
+def test_participant_export_query_count_does_not_grow_with_rows(app, client, login, count_queries, export_format):
+    participants = 20
+    with app.app_context():
+        create_user('admin@example.com', is_admin=True, password=PASSWORD)
+        competition_id = create_competition().id
+        add_participants(competition_id, 0, participants)
+
+    login('admin@example.com')
+    url = f'/admin/export/participants/{competition_id}?format={export_format}'
+
+    with count_queries() as small:
+        response = client.get(url)
+        body = response.get_data()
+    assert response.status_code == 200
+    assert body
+
+    with app.app_context():
+        add_participants(competition_id, participants, 9 * participants)
+
+    with count_queries() as large:
+        response = client.get(url)
+        body = response.get_data()
+    assert response.status_code == 200
+
+    if export_format == 'csv':
+        assert body.decode('utf-8').count('peserta') == 10 * participants
+    assert len(large) == len(small)
@@ -0,0 +1,24 @@
+import pytest
+from app import db
+from tests.conftest import PASSWORD, create_user
+
+
+# Statements per request for each page, identity load included
+@pytest.mark.parametrize('url, expected_statements', [('/dashboard', 3), ('/profil', 1)])
+def test_authenticated_page_loads_identity_in_one_query(app, client, login, count_queries, url, expected_statements):
+    with app.app_context():
+        create_user('siswa@example.com', password=PASSWORD,
+                    nama_lengkap='Siswa', sekolah='SMP Negeri 1', kelas=8)
+        db.session.commit()
+
+    login('siswa@example.com')
+
+    with count_queries() as statements:
+        response = client.get(url)
+    assert response.status_code == 200
+
+    identity = [statement for statement in statements if 'FROM users' in statement]
+    assert len(identity) == 1
+    assert 'user_profiles' in identity[0]
+    assert sum('user_profiles' in statement for statement in statements) == 1
+    assert len(statements) == expected_statements
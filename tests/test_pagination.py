@@ -0,0 +1,48 @@
+import re
+from datetime import datetime, timedelta
+from app import db
+from tests.conftest import PASSWORD, create_user, create_competition
+
+
+def test_payment_list_pages_across_deleted_upload(app, client, login):
+    from app.models.registration import Registration
+    from app.models.payment import Payment
+
+    now = datetime.utcnow()
+    with app.app_context():
+        create_user('admin@example.com', is_admin=True, password=PASSWORD)
+        competition_id = create_competition().id
+        payment_ids = []
+        for number in range(7):
+            user = create_user(f'peserta{number}@example.com', nama_lengkap=f'Peserta {number}')
+            registration = Registration(user_id=user.id, competition_id=competition_id, harga_terkunci=50000)
+            db.session.add(registration)
+            db.session.flush()
+            payment = Payment(registration_id=registration.id, jumlah=50000,
+                              bukti_pembayaran=f'bukti{number}.jpg',
+                              tanggal_upload=now - timedelta(minutes=number))
+            db.session.add(payment)
+            db.session.flush()
+            payment_ids.append(payment.id)
+
+        # Proofs deleted by participants, one of them on a page boundary
+        for payment_id in (payment_ids[1], payment_ids[4]):
+            payment = db.session.get(Payment, payment_id)
+            payment.bukti_pembayaran = None
+            payment.tanggal_upload = None
+        db.session.commit()
+
+    login('admin@example.com')
+    seen = []
+    query = {'status': 'pending', 'per_page': 2}
+    for _ in range(len(payment_ids)):
+        html = client.get('/admin/pembayaran', query_string=query).get_data(as_text=True)
+        seen.extend(int(payment_id) for payment_id in
+                    dict.fromkeys(re.findall(r'payment-card" data-payment-id="(\d+)"', html)))
+        cursor = re.search(r'[?&;]cursor=([^"&]+)"', html)
+        if not cursor:
+            break
+        query['cursor'] = cursor.group(1)
+
+    uploaded = [payment_ids[number] for number in (0, 2, 3, 5, 6)]
+    assert seen == uploaded + sorted([payment_ids[1], payment_ids[4]], reverse=True)
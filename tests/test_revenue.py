@@ -0,0 +1,57 @@
+from app import db
+from tests.conftest import create_user, create_competition
+
+
+def add_approved_payment(competition_id, number, price):
+    """Register a participant at a locked price and approve the payment"""
+    from app.models.registration import Registration
+    from app.models.payment import Payment
+
+    user = create_user(f'peserta{number}@example.com')
+    registration = Registration(user_id=user.id, competition_id=competition_id, harga_terkunci=price)
+    db.session.add(registration)
+    db.session.flush()
+    payment = Payment(registration_id=registration.id, jumlah=price + number)
+    db.session.add(payment)
+    db.session.commit()
+
+    payment.approve_payment(admin_user_id=None)
+    return registration
+
+
+def rollup(competition_id):
+    """Get rollup counters of a competition as a dict, empty without revenue"""
+    from app.models.ledger import CompetitionRevenue
+
+    db.session.expire_all()
+    revenue = db.session.get(CompetitionRevenue, competition_id)
+    return {name: getattr(revenue, name) for name in CompetitionRevenue.COUNTERS} if revenue else {}
+
+
+def test_rollup_follows_price_changes_and_deletes(app):
+    with app.app_context():
+        competition = create_competition(harga_early_bird=50000, harga_reguler=75000)
+        registrations = [add_approved_payment(competition.id, 1, 50000),
+                         add_approved_payment(competition.id, 2, 75000)]
+        assert rollup(competition.id) == {
+            'paid_count': 2, 'revenue': 125003,
+            'early_bird_count': 1, 'early_bird_revenue': 50001,
+            'regular_count': 1, 'regular_revenue': 75002,
+        }
+
+        # Tiers are reclassified by the new early bird price
+        competition.harga_early_bird = 75000
+        db.session.commit()
+        assert rollup(competition.id)['early_bird_revenue'] == 75002
+
+        db.session.delete(registrations[1])
+        db.session.commit()
+        assert rollup(competition.id) == {
+            'paid_count': 1, 'revenue': 50001,
+            'early_bird_count': 0, 'early_bird_revenue': 0,
+            'regular_count': 1, 'regular_revenue': 50001,
+        }
+
+        db.session.delete(registrations[0].payment)
+        db.session.commit()
+        assert rollup(competition.id) == {}
@@ -0,0 +1,116 @@
+import csv
+import io
+from app import db
+from tests.conftest import PASSWORD, create_user, create_competition
+
+
+def seed_competition(number, registrations):
+    """Create a competition with (locked price, registration status, payment status or None) registrations"""
+    from app.models.registration import Registration
+    from app.models.payment import Payment
+
+    competition = create_competition(nama_kompetisi=f'Lomba {number}',
+                                     harga_early_bird=50000 + number * 1000, harga_reguler=75000 + number * 1000)
+    for index, (price, status, payment_status) in enumerate(registrations):
+        user = create_user(f'peserta{number}-{index}@example.com')
+        registration = Registration(user_id=user.id, competition_id=competition.id,
+                                    harga_terkunci=price(competition), status=status)
+        db.session.add(registration)
+        db.session.flush()
+        if payment_status:
+            db.session.add(Payment(registration_id=registration.id, jumlah=price(competition) + index,
+                                   status=payment_status))
+    db.session.commit()
+    return competition
+
+
+def loop_revenue_rows():
+    """Revenue report numbers computed like the original per-competition loop"""
+    from app.models.competition import Competition
+    from app.models.registration import Registration
+
+    rows = []
+    for competition in Competition.query.order_by(Competition.id):
+        registrations = Registration.query.filter_by(competition_id=competition.id).all()
+        approved_registrations = [r for r in registrations if r.status == 'approved']
+        paid_registrations = [r for r in registrations if r.payment and r.payment.status == 'approved']
+
+        early_bird_revenue = 0
+        regular_revenue = 0
+        for registration in paid_registrations:
+            if registration.harga_terkunci == competition.harga_early_bird:
+                early_bird_revenue += registration.payment.jumlah
+            else:
+                regular_revenue += registration.payment.jumlah
+
+        rows.append([
+            competition.nama_kompetisi,
+            str(len(registrations)),
+            str(len(approved_registrations)),
+            str(len(paid_registrations)),
+            f"Rp {early_bird_revenue:,}",
+            f"Rp {regular_revenue:,}",
+            f"Rp {early_bird_revenue + regular_revenue:,}"
+        ])
+    return rows
+
+
+def test_revenue_report_matches_per_competition_loop(app, client, login):
+    from app.models.ledger import CompetitionRevenue
+
+    early = lambda competition: competition.harga_early_bird
+    regular = lambda competition: competition.harga_reguler
+
+    with app.app_context():
+        create_user('admin@example.com', is_admin=True, password=PASSWORD)
+        seed_competition(1, [
+            (early, 'approved', 'approved'),
+            (early, 'approved', 'approved'),
+            (regular, 'approved', 'approved'),
+            (regular, 'pending', 'pending'),
+            (early, 'rejected', 'rejected'),
+            (regular, 'pending', None),
+        ])
+        seed_competition(2, [(regular, 'approved', 'approved'), (early, 'pending', 'pending')])
+        seed_competition(3, [])
+        edited = seed_competition(4, [(early, 'approved', 'approved'), (regular, 'approved', 'approved')])
+
+        # Live classification follows price edits made after approval
+        edited.harga_early_bird = edited.harga_reguler
+        db.session.commit()
+
+        # Report does not depend on rollups, which are empty on upgraded databases
+        db.session.execute(db.delete(CompetitionRevenue))
+        db.session.commit()
+
+        expected = loop_revenue_rows()
+
+    login('admin@example.com')
+    response = client.get('/admin/export/revenue')
+    assert response.status_code == 200
+
+    report = list(csv.reader(io.StringIO(response.get_data(as_text=True).lstrip('﻿'))))
+    competition_rows = [row for row in report[1:] if row and row[0] != 'TOTAL']
+    assert [[row[1]] + row[6:] for row in competition_rows] == expected
+    assert report[-1][-1] == f"Rp {sum(int(row[-1][3:].replace(',', '')) for row in expected):,}"
+
+
+def test_revenue_report_query_count_does_not_grow_with_rows(app, client, login, count_queries):
+    early = lambda competition: competition.harga_early_bird
+    regular = lambda competition: competition.harga_reguler
+
+    with app.app_context():
+        create_user('admin@example.com', is_admin=True, password=PASSWORD)
+        seed_competition(1, [(early, 'approved', 'approved'), (regular, 'pending', 'pending')])
+
+    login('admin@example.com')
+    with count_queries() as small:
+        assert client.get('/admin/export/revenue').status_code == 200
+
+    with app.app_context():
+        for number in range(2, 6):
+            seed_competition(number, [(early, 'approved', 'approved'), (regular, 'approved', 'approved')] * 20)
+
+    with count_queries() as large:
+        assert client.get('/admin/export/revenue').status_code == 200
+    assert len(large) == len(small)
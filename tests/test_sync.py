@@ -0,0 +1,25 @@
+from datetime import datetime, timedelta
+from app import db
+from app.models.user import UserProfile
+from tests.conftest import PASSWORD, create_user
+
+
+def test_change_polling_picks_up_rows_committed_late(app, client, login):
+    with app.app_context():
+        create_user('admin@example.com', is_admin=True, password=PASSWORD)
+        create_user('siswa1@example.com', nama_lengkap='Siswa Satu')
+        db.session.commit()
+
+    login('admin@example.com')
+    first = client.get('/admin/api/verifikasi/perubahan').get_json()
+    assert [user['email'] for user in first['users']] == ['siswa1@example.com']
+
+    # Flushed before the previous poll ran but committed after it
+    with app.app_context():
+        user = create_user('siswa2@example.com')
+        db.session.add(UserProfile(user_id=user.id, nama_lengkap='Siswa Dua',
+                                   updated_at=datetime.utcnow() - timedelta(seconds=5)))
+        db.session.commit()
+
+    second = client.get('/admin/api/verifikasi/perubahan', query_string={'since': first['watermark']}).get_json()
+    assert 'siswa2@example.com' in [user['email'] for user in second['users']]
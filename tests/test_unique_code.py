@@ -0,0 +1,58 @@
+import pytest
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models.payment import Payment
+from tests.conftest import create_user, create_competition
+
+
+def add_registration(competition_id, number):
+    """Register a participant at the early bird price"""
+    from app.models.registration import Registration
+
+    user = create_user(f'peserta{number}@example.com')
+    registration = Registration(user_id=user.id, competition_id=competition_id, harga_terkunci=50000)
+    db.session.add(registration)
+    db.session.flush()
+    return registration
+
+
+def test_code_collision_is_retried(app, monkeypatch):
+    app.config['PAYMENT_UNIQUE_CODE'] = True
+    assign_unique_code = Payment.assign_unique_code
+    attempts = []
+
+    def assign_taken_code_first(payment, competition_id):
+        # A concurrent registration committed code 1 after this one picked it
+        attempts.append(payment.jumlah)
+        if len(attempts) == 1:
+            payment.kode_unik = 1
+            payment.jumlah += 1
+            return 1
+        return assign_unique_code(payment, competition_id)
+
+    with app.app_context():
+        competition_id = create_competition().id
+        first = Payment(registration_id=add_registration(competition_id, 1).id, jumlah=50000)
+        first.add_with_unique_code(competition_id)
+        db.session.commit()
+        assert (first.kode_unik, first.jumlah) == (1, 50001)
+
+        monkeypatch.setattr(Payment, 'assign_unique_code', assign_taken_code_first)
+        registration = add_registration(competition_id, 2)
+        second = Payment(registration_id=registration.id, jumlah=50000)
+        assert second.add_with_unique_code(competition_id) == 2
+        db.session.commit()
+
+        assert attempts == [50000, 50000]
+        assert db.session.get(Payment, second.id).jumlah == 50002
+        assert db.session.get(type(registration), registration.id) is not None
+
+
+def test_pending_payments_cannot_share_coded_amount(app):
+    with app.app_context():
+        competition_id = create_competition().id
+        for number in (1, 2):
+            db.session.add(Payment(registration_id=add_registration(competition_id, number).id,
+                                   jumlah=50001, kode_unik=1))
+        with pytest.raises(IntegrityError):
+            db.session.commit()